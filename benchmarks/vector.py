@@ -0,0 +1,59 @@
+"""Timings of Vector heavy code paths.
+
+Run from the repository root with: python -m benchmarks.vector
+"""
+import math
+import random
+import timeit
+
+import numpy as np
+
+from gsnlib.geometry import CSG
+from gsnlib.vector import Vector
+from gsnlib.wirenetwork import WireNetwork
+
+
+def vector_ops():
+    a, b = Vector(1.0, 2.0), Vector(3.0, 4.0)
+    for _ in range(100000):
+        a.plus(b).minus(b).times(0.5).lerp(b, 0.25).dist(a)
+
+
+def construct():
+    for i in range(100000):
+        Vector(i, i)
+        Vector.from_array([i, i])
+
+
+def polygon(cx: float, cy: float, r: float, n: int):
+    return [[cx + r * math.cos(2 * math.pi * i / n),
+             cy + r * math.sin(2 * math.pi * i / n)] for i in range(n)]
+
+
+def csg():
+    for i in range(20):
+        a = CSG.from_polygons([polygon(0, 0, 10, 24)])
+        b = CSG.from_polygons([polygon(i, 2, 8, 24)])
+        a.union(b).to_polygons()
+        a.subtract(b).to_polygons()
+
+
+def wirenetwork():
+    rng = random.Random(0)
+    network = WireNetwork()
+    for _ in range(150):
+        network.add_segment([rng.uniform(0, 100), rng.uniform(0, 100)],
+                            [rng.uniform(0, 100), rng.uniform(0, 100)])
+
+
+def wirenetwork_bulk():
+    rng = np.random.default_rng(0)
+    network = WireNetwork()
+    network.add_segments(rng.uniform(0, 100, (600, 4)))
+
+
+if __name__ == '__main__':
+    for name in ('vector_ops', 'construct', 'csg',
+                 'wirenetwork', 'wirenetwork_bulk'):
+        best = min(timeit.repeat(globals()[name], number=1, repeat=9))
+        print(f"{name:20s} {best * 1000:8.1f} ms")
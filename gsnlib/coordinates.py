@@ -1,46 +1,151 @@
-from typing import List
+import math
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 import numpy as np
 
+from gsnlib.vector import Vector
+from gsnlib.vectorarray import VectorArray
+
+Rows = Tuple[float, ...]
+Points = Union[np.ndarray, VectorArray, Sequence[Vector]]
+
+
+def _points(points: Points, dimensions: int) -> np.ndarray:
+    if isinstance(points, VectorArray):
+        return points.data[:, :dimensions]
+    if not isinstance(points, np.ndarray) and len(points) \
+            and isinstance(points[0], Vector):
+        return np.array([(p.x, p.y, p.z)[:dimensions] for p in points],
+                        dtype=float)
+    array = np.asarray(points, dtype=float)
+    if not array.size:
+        return array.reshape(0, dimensions)
+    if dimensions == 3 and array.shape[-1] == 2:
+        # Plain 2D points lie at z = 0, as Vectors do
+        array = array.reshape(-1, 2)
+        return np.column_stack((array, np.zeros(len(array))))
+    if array.ndim > 2 or array.shape[-1] != dimensions:
+        raise ValueError("Expected points of shape (N, %d), got %s"
+                         % (dimensions, array.shape))
+    return array.reshape(-1, dimensions)
+
+
+class _Transform(ABC):
+    # The stack and point mapping shared by Coordinates and Coordinates3D,
+    # which keep the top rows of their matrix as floats
+    dimensions = 2
+
+    @abstractmethod
+    def _save(self) -> Rows:
+        """The floats of the transform."""
+
+    @abstractmethod
+    def _load(self, rows: Rows):
+        """Set the transform from what _save returned."""
+
+    @staticmethod
+    @abstractmethod
+    def _matrix(*rows: float) -> np.ndarray:
+        """The full matrix of what _save returned."""
+
+    def _reset_stack(self):
+        # Pushed transforms are rows of a list that doubles when full,
+        # so push and pop only move depth
+        self._stack: List[Rows] = [self._save()] * 16
+        self.depth = 0
+        self.peak_depth = 0
+
+    def push(self):
+        if self.depth == len(self._stack):
+            self._stack.extend(self._stack)
+        self._stack[self.depth] = self._save()
+        self.depth += 1
+        if self.depth > self.peak_depth:
+            self.peak_depth = self.depth
+
+    def pop(self):
+        if self.depth == 0:
+            raise IndexError("pop from an empty stack")
+        self.depth -= 1
+        self._load(self._stack[self.depth])
+
+    @property
+    def stack(self) -> List[np.ndarray]:
+        return [self._matrix(*rows) for rows in self._stack[:self.depth]]
+
+    def apply(self, points: Points) -> np.ndarray:
+        """Map an (N, dimensions) array or Vectors through the transform,
+        as an (N, dimensions) array. Coordinates3D takes (N, 2) arrays as
+        points at z = 0."""
+        n, m = self.dimensions, self.matrix
+        return _points(points, n).dot(m[:n, :n].T) + m[:n, n]
+
+    def apply_inverse(self, points: Points) -> np.ndarray:
+        """Map points back from the transformed space, the inverse of
+        apply."""
+        n, m = self.dimensions, self.matrix
+        try:
+            inverse = np.linalg.inv(m[:n, :n])
+        except np.linalg.LinAlgError:
+            raise ValueError("The transform is not invertible")
+        return (_points(points, n) - m[:n, n]).dot(inverse.T)
+
+
+class Coordinates(_Transform):
+    """A 2D affine transform, kept as the six floats of the top two rows
+    of its 3 x 3 matrix so that translate, rotate and scale update it in
+    place without allocating."""
 
-class Coordinates(object):
     def __init__(self):
-        self.matrix = np.identity(3)
-        self.stack: List[np.ndarray] = []
+        self.reset()
 
     def reset(self):
-        self.matrix = np.identity(3)
-        self.stack = []
+        self.a, self.b, self.c = 1.0, 0.0, 0.0
+        self.d, self.e, self.f = 0.0, 1.0, 0.0
+        self._reset_stack()
+
+    def _save(self) -> Rows:
+        return self.a, self.b, self.c, self.d, self.e, self.f
+
+    def _load(self, rows: Rows):
+        self.a, self.b, self.c, self.d, self.e, self.f = rows
+
+    @staticmethod
+    def _matrix(*rows: float) -> np.ndarray:
+        return np.array(rows + (0.0, 0.0, 1.0)).reshape(3, 3)
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return self._matrix(*self._save())
+
+    @matrix.setter
+    def matrix(self, m: np.ndarray):
+        self._load(np.asarray(m, dtype=float)[:2].ravel().tolist())
 
     def translate(self, x: float, y: float):
-        m = np.identity(3)
-        m[0, 2] = x
-        m[1, 2] = y
-        self.matrix = self.matrix.dot(m)
+        self.c += self.a * x + self.b * y
+        self.f += self.d * x + self.e * y
 
     def rotate(self, v: float):
-        r = np.identity(3)
-        r[0, 0] = np.cos(v)
-        r[0, 1] = -np.sin(v)
-        r[1, 0] = np.sin(v)
-        r[1, 1] = np.cos(v)
-        self.matrix = self.matrix.dot(r)
+        cos, sin = math.cos(v), math.sin(v)
+        a, b, d, e = self.a, self.b, self.d, self.e
+        self.a, self.b = a * cos + b * sin, b * cos - a * sin
+        self.d, self.e = d * cos + e * sin, e * cos - d * sin
 
     def scale(self, v: float):
-        s = np.identity(3)
-        s[0, 0] = v
-        s[1, 1] = v
-        self.matrix = self.matrix.dot(s)
+        self.a *= v
+        self.b *= v
+        self.d *= v
+        self.e *= v
 
-    def push(self):
-        self.stack.append(self.matrix.copy())
-
-    def pop(self):
-        self.matrix = self.stack.pop()
+    @property
+    def position(self) -> Tuple[float, float]:
+        """The transformed origin, without the rounding of pos."""
+        return self.c, self.f
 
     @property
     def pos(self):
-        pos = np.array([0, 0, 1])
-        return self.matrix.dot(pos).round(3)[0:2]
+        return np.array([self.c, self.f]).round(3)
 
     @property
     def pos3d(self):
@@ -48,8 +153,207 @@ class Coordinates(object):
 
     @property
     def x(self) -> float:
-        return self.pos[0]
+        return np.round(self.c, 3)
+
+    @property
+    def y(self) -> float:
+        return np.round(self.f, 3)
+
+
+class Coordinates3D(_Transform):
+    """A 3D affine transform, kept as the twelve floats of the top three
+    rows of its 4 x 4 matrix.
+
+    Angles turn counter-clockwise looking down an axis. The heading is x
+    as in Coordinates, so yaw turns about z, pitch about y and roll about
+    x, and rotate is yaw.
+    """
+    dimensions = 3
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._m = [1.0, 0.0, 0.0, 0.0,
+                   0.0, 1.0, 0.0, 0.0,
+                   0.0, 0.0, 1.0, 0.0]
+        self._reset_stack()
+
+    def _save(self) -> Rows:
+        return tuple(self._m)
+
+    def _load(self, rows: Rows):
+        self._m = list(rows)
+
+    @staticmethod
+    def _matrix(*rows: float) -> np.ndarray:
+        return np.array(rows + (0.0, 0.0, 0.0, 1.0)).reshape(4, 4)
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return self._matrix(*self._m)
+
+    @matrix.setter
+    def matrix(self, m: np.ndarray):
+        self._load(np.asarray(m, dtype=float)[:3].ravel().tolist())
+
+    def translate(self, x: float, y: float, z: float = 0.0):
+        m = self._m
+        m[3] += m[0] * x + m[1] * y + m[2] * z
+        m[7] += m[4] * x + m[5] * y + m[6] * z
+        m[11] += m[8] * x + m[9] * y + m[10] * z
+
+    def _turn(self, i: int, j: int, v: float):
+        # Right multiply by the rotation of axis i towards axis j
+        cos, sin = math.cos(v), math.sin(v)
+        m = self._m
+        for r in (0, 4, 8):
+            u, w = m[r + i], m[r + j]
+            m[r + i], m[r + j] = u * cos + w * sin, w * cos - u * sin
+
+    def rotate_x(self, v: float):
+        self._turn(1, 2, v)
+
+    def rotate_y(self, v: float):
+        self._turn(2, 0, v)
+
+    def rotate_z(self, v: float):
+        self._turn(0, 1, v)
+
+    def yaw(self, v: float):
+        self._turn(0, 1, v)
+
+    def pitch(self, v: float):
+        self._turn(2, 0, v)
+
+    def roll(self, v: float):
+        self._turn(1, 2, v)
+
+    def rotate(self, v: float):
+        self._turn(0, 1, v)
+
+    def scale(self, x: float,
+              y: Optional[float] = None,
+              z: Optional[float] = None):
+        """Scale by x along every axis, or by x, y and z along each."""
+        if y is None and z is None:
+            y = z = x
+        elif y is None or z is None:
+            raise ValueError("Scale takes one factor or three")
+        m = self._m
+        for r in (0, 4, 8):
+            m[r] *= x
+            m[r + 1] *= y
+            m[r + 2] *= z
+
+    @property
+    def position(self) -> Tuple[float, float, float]:
+        """The transformed origin, without the rounding of pos."""
+        return self._m[3], self._m[7], self._m[11]
+
+    @property
+    def pos(self):
+        return np.array(self.position).round(3)
+
+    @property
+    def pos3d(self):
+        return self.pos
+
+    @property
+    def x(self) -> float:
+        return np.round(self._m[3], 3)
 
     @property
     def y(self) -> float:
-        return self.pos[1]
+        return np.round(self._m[7], 3)
+
+    @property
+    def z(self) -> float:
+        return np.round(self._m[11], 3)
+
+
+Param = Union[float, str]
+
+
+class Program(object):
+    """A recorded sequence of Coordinates calls, to replay for many sets
+    of parameters at once.
+
+    Arguments are numbers, or names of parameters looked up when the
+    program is replayed. mark records the position at that point of the
+    sequence.
+    """
+
+    def __init__(self):
+        self.ops: List[Tuple[str, Tuple[Param, ...]]] = []
+
+    def translate(self, x: Param, y: Param) -> 'Program':
+        self.ops.append(('translate', (x, y)))
+        return self
+
+    def rotate(self, v: Param) -> 'Program':
+        self.ops.append(('rotate', (v, )))
+        return self
+
+    def scale(self, v: Param) -> 'Program':
+        self.ops.append(('scale', (v, )))
+        return self
+
+    def push(self) -> 'Program':
+        self.ops.append(('push', ()))
+        return self
+
+    def pop(self) -> 'Program':
+        self.ops.append(('pop', ()))
+        return self
+
+    def mark(self) -> 'Program':
+        self.ops.append(('mark', ()))
+        return self
+
+    @property
+    def marks(self) -> int:
+        return sum(op == 'mark' for op, _ in self.ops)
+
+    def replay(self,
+               params: Optional[Dict[str, Sequence[float]]] = None,
+               batch: Optional[int] = None) -> np.ndarray:
+        """The marked positions for a batch of B parameter sets, given as
+        an array of B values per parameter name, as a (B, K, 2) array for
+        K marks. B is one if there are no parameters and no batch."""
+        values = {name: np.asarray(v, dtype=float)
+                  for name, v in (params or {}).items()}
+        if batch is None:
+            batch = np.broadcast_shapes((1, ), *(v.shape
+                                                 for v in values.values()))[0]
+
+        def value(p: Param):
+            return values[p] if isinstance(p, str) else p
+
+        ones, zeros = np.ones(batch), np.zeros(batch)
+        a, b, c, d, e, f = ones, zeros, zeros, zeros, ones, zeros
+        stack = []
+        marks = []
+        for op, args in self.ops:
+            if op == 'translate':
+                x, y = value(args[0]), value(args[1])
+                c, f = c + a * x + b * y, f + d * x + e * y
+            elif op == 'rotate':
+                v = value(args[0])
+                cos, sin = np.cos(v), np.sin(v)
+                a, b = a * cos + b * sin, b * cos - a * sin
+                d, e = d * cos + e * sin, e * cos - d * sin
+            elif op == 'scale':
+                v = value(args[0])
+                a, b, d, e = a * v, b * v, d * v, e * v
+            elif op == 'push':
+                stack.append((a, b, c, d, e, f))
+            elif op == 'pop':
+                a, b, c, d, e, f = stack.pop()
+            else:
+                marks.append(np.broadcast_to(np.stack((c, f), axis=-1),
+                                             (batch, 2)))
+
+        if not marks:
+            return np.empty((batch, 0, 2))
+        return np.stack(marks, axis=1)
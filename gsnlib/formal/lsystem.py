@@ -1,4 +1,6 @@
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
+
+from gsnlib.lsystem import expand
 
 
 class lsystem:
@@ -35,3 +37,8 @@ class lsystem:
                 new_state.append(self.rules.get(s, s))
 
             self.state = "".join(new_state)
+
+    def expand(self, iterations: int = 1) -> Iterator[str]:
+        """The symbols update would give the state, one at a time, without
+        building the string or changing the state."""
+        return expand(self.get_state(), self.rules, iterations)
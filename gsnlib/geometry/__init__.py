@@ -1,4 +1,5 @@
 from ..vector import Vector  # noqa
+from ..vectorarray import VectorArray  # noqa
 from .node import Node  # noqa
 from .segment import Segment  # noqa
 from .line import Line  # noqa
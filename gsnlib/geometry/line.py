@@ -57,8 +57,11 @@ class Line:
         segment_type = 0
         types: List[int] = []
         t: float = 0.0
+        normal = self.normal
+        scratch = Vector()
         for i in range(len(segment.vertices)):
-            t = self.normal.dot(segment.vertices[i].minus(self.origin))
+            t = normal.dot(scratch.assign(segment.vertices[i])
+                           .iminus(self.origin))
             type = COLINEAR
             if (t < -EPSILON):
                 type = RIGHT
@@ -105,18 +108,18 @@ class Line:
                 new_left.append(vj)
 
             if ti == RIGHT and tj == LEFT:
-                t = (self.normal.dot(self.origin.minus(vi))) \
-                    / self.normal.dot(vj.minus(vi))
-                v = vi.lerp(vj, t)
+                t = (normal.dot(scratch.assign(self.origin).iminus(vi))
+                     / normal.dot(scratch.assign(vj).iminus(vi)))
+                v = vi.clone().ilerp(vj, t)
                 new_right.append(vi)
                 new_right.append(v)
                 new_left.append(v.clone())
                 new_left.append(vj)
 
             if ti == LEFT and tj == RIGHT:
-                t = (self.normal.dot(self.origin.minus(vi))) \
-                    / self.normal.dot(vj.minus(vi))
-                v = vi.lerp(vj, t)
+                t = (normal.dot(scratch.assign(self.origin).iminus(vi))
+                     / normal.dot(scratch.assign(vj).iminus(vi)))
+                v = vi.clone().ilerp(vj, t)
                 new_left.append(vi)
                 new_left.append(v)
                 new_right.append(v.clone())
@@ -1,4 +1,32 @@
-from typing import Dict
+from typing import Dict, Iterator
+
+
+def expand(axiom: str, rules: Dict[str, str],
+           generations: int) -> Iterator[str]:
+    """The symbols of axiom rewritten generations times by rules, one at
+    a time.
+
+    Rules are expanded depth first as the symbols are read, so only the
+    rule being read at each generation is held rather than the string.
+    """
+    if generations <= 0:
+        yield from axiom
+        return
+
+    stack = [iter(axiom)]
+    while stack:
+        last = len(stack) == generations
+        for symbol in stack[-1]:
+            if symbol not in rules:
+                yield symbol
+            elif last:
+                # Symbols of the final generation are not rewritten again
+                yield from rules[symbol]
+            else:
+                stack.append(iter(rules[symbol]))
+                break
+        else:
+            stack.pop()
 
 
 class LSystem(object):
@@ -16,5 +44,10 @@ class LSystem(object):
         self.state = "".join([self.rules.get(c, c) for c in self.state])
         return self.state
 
+    def expand(self, generations: int = 1) -> Iterator[str]:
+        """The symbols iterate would give after generations calls, without
+        building the string or changing the state."""
+        return expand(self.state, self.rules, generations)
+
     def add_rule(self, case: str, result: str):
         self.rules[case] = result
@@ -1,11 +1,20 @@
 #!/usr/bin/env python
 # -*- coding: utf8 -*-
 
+import heapq
 import math
-from typing import List
+from concurrent.futures import ProcessPoolExecutor
+from typing import (Dict, Iterable, Iterator, List, Optional, Tuple,
+                    Union)
+
+import numpy as np
+
 from .vector import Vector
+from .vectorarray import VectorArray
 from gsnlib.constants import EPSILON
 
+Points = Union[List[Vector], VectorArray, np.ndarray]
+
 
 def pointlinedist(p: Vector, p1: Vector, p2: Vector):
     dy = p2.y - p1.y
@@ -19,34 +28,558 @@ def pointlinedist(p: Vector, p1: Vector, p2: Vector):
     return a / b
 
 
-def reduce_shapes(shapes: List[List[List[Vector]]], tolerance: float):
-    out = [[reduce_points(part, tolerance) for part in shape]
-           for shape in shapes]
-    return out
+def _span_distances(x: np.ndarray, y: np.ndarray, index: np.ndarray,
+                    counts: np.ndarray, starts: np.ndarray,
+                    ends: np.ndarray) -> np.ndarray:
+    # pointlinedist of the points at index to the line of their span, with
+    # the terms that only depend on the line worked out once per span
+    x1, y1, x2, y2 = x[starts], y[starts], x[ends], y[ends]
+    dy = y2 - y1
+    dx = x2 - x1
+    b = np.sqrt(dy * dy + dx * dx)
+
+    px, py = x[index], y[index]
+    a = np.abs(np.repeat(dy, counts) * px - np.repeat(dx, counts) * py
+               + np.repeat(x2 * y1, counts) - np.repeat(y2 * x1, counts))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d = a / np.repeat(b, counts)
+
+    degenerate = np.repeat(b < EPSILON, counts)
+    if degenerate.any():
+        at = np.flatnonzero(degenerate)
+        ex = px[at] - np.repeat(x1, counts)[at]
+        ey = py[at] - np.repeat(y1, counts)[at]
+        d[at] = np.sqrt(ex * ex + ey * ey)
+    return d
+
+
+def _as_array(points: Points) -> np.ndarray:
+    if isinstance(points, VectorArray):
+        return points.data[:, :2]
+    if isinstance(points, np.ndarray):
+        return np.asarray(points, dtype=np.float64)[:, :2]
+    return np.array([(p.x, p.y) for p in points],
+                    dtype=np.float64).reshape(-1, 2)
+
+
+def _reduce_packed(coords: np.ndarray,
+                   lengths: np.ndarray,
+                   tolerance: float) -> np.ndarray:
+    # Douglas-Peucker masks of polylines packed end to end in coords. Rather
+    # than recursing, every span still to be split, of every polyline, is
+    # measured in one NumPy pass per level.
+    x = np.ascontiguousarray(coords[:, 0])
+    y = np.ascontiguousarray(coords[:, 1])
+    keep = np.zeros(len(coords), dtype=bool)
+
+    lengths = np.asarray(lengths, dtype=np.intp)
+    lengths = lengths[lengths > 0]
+    ends = np.cumsum(lengths) - 1
+    starts = ends - lengths + 1
+    keep[starts] = True
+    keep[ends] = True
+
+    while True:
+        # In order along the line, so the gathers below run forwards
+        more = np.flatnonzero(ends - starts > 1)
+        more = more[np.argsort(starts[more])]
+        starts, ends = starts[more], ends[more]
+        if len(starts) == 0:
+            return keep
+
+        # Interior points of all spans, one after the other
+        counts = ends - starts - 1
+        offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        positions = np.arange(offsets[-1] + counts[-1])
+        index = positions + np.repeat(starts + 1 - offsets, counts)
+
+        d = _span_distances(x, y, index, counts, starts, ends)
+
+        # The first point furthest from its span's line
+        dmax = np.maximum.reduceat(d, offsets)
+        first = np.where(d == np.repeat(dmax, counts), positions, len(d))
+        split = dmax > tolerance
+        at = index[np.minimum.reduceat(first, offsets)[split]]
+
+        keep[at] = True
+        starts, ends = (np.concatenate((starts[split], at)),
+                        np.concatenate((at, ends[split])))
+
+
+def reduce_mask(points: Points, tolerance: float) -> np.ndarray:
+    """Douglas-Peucker simplification of a polyline as a boolean mask of
+    the points to keep.
+
+    Takes a list of Vector, a VectorArray or an (N, 2) array. The
+    distances of all points still in question are worked out with NumPy a
+    level at a time, so long traces neither hit the recursion limit nor
+    pay for Python calls per point.
+    """
+    coords = _as_array(points)
+    return _reduce_packed(coords, np.array([len(coords)]), tolerance)
+
+
+def _select(points: Points, keep: np.ndarray) -> Points:
+    # Points at a boolean mask or array of indices
+    if isinstance(points, (np.ndarray, VectorArray)):
+        return points[keep]
+    if keep.dtype == bool:
+        keep = np.flatnonzero(keep)
+    return [points[i] for i in keep.tolist()]
+
+
+def reduce_points(points: Points, tolerance: float) -> Points:
+    """Douglas-Peucker simplification of a polyline, returned as the same
+    type it was given."""
+    return _select(points, reduce_mask(points, tolerance))
 
 
-def reduce_points(points: List[Vector], tolerance: float) -> List[Vector]:
-    dmax = 0
-    index = 0
-    end = len(points) - 1
+def _reduce_chunk(args: Tuple[np.ndarray, np.ndarray, float]) -> np.ndarray:
+    return _reduce_packed(*args)
 
-    p0 = points[0]
-    p1 = points[end]
 
-    for i in range(1, end):
-        d = pointlinedist(points[i], p0, p1)
-        if d > dmax:
-            dmax = d
-            index = i
+def _reduce_many(coords: np.ndarray,
+                 lengths: np.ndarray,
+                 tolerance: float,
+                 workers: Optional[int],
+                 chunk_size: int) -> np.ndarray:
+    # Douglas-Peucker masks of many polylines, packed end to end, in chunks
+    # of whole polylines of about chunk_size points
+    bounds = np.concatenate(([0], np.cumsum(lengths)))
+    chunks: List[Tuple[np.ndarray, np.ndarray, float]] = []
+    start = 0
+    while start < len(lengths):
+        end = int(np.searchsorted(bounds, bounds[start] + chunk_size))
+        end = min(max(end, start + 1), len(lengths))
+        chunks.append((coords[bounds[start]:bounds[end]],
+                       lengths[start:end], tolerance))
+        start = end
 
-    if dmax > tolerance:
-        res1 = reduce_points(points[0:index + 1], tolerance)
-        res2 = reduce_points(points[index:], tolerance)
-        outpoints = res1 + res2[1:]
+    if workers is not None and workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            masks = list(pool.map(_reduce_chunk, chunks))
     else:
-        outpoints = [p0, p1]
+        masks = [_reduce_chunk(chunk) for chunk in chunks]
+    return np.concatenate([np.empty(0, dtype=bool)] + masks)
+
+
+def _vertex_ids(coords: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Ids of the distinct points in lexicographic order, so that comparing
+    # ids compares points, and those points. Complex numbers sort on their
+    # real part, then their imaginary part. This sort is about half the
+    # cost of topology, but ring starts and arc directions depend on the
+    # order, so it cannot be swapped for hashing the points.
+    z = np.ascontiguousarray(coords).view(np.complex128)[:, 0]
+    order = np.argsort(z)
+    new = np.ones(len(coords), dtype=bool)
+    new[1:] = np.diff(z[order]) != 0
+    ids = np.empty(len(coords), dtype=np.int64)
+    ids[order] = np.cumsum(new) - 1
+    return ids, coords[order[new]]
+
+
+def _junctions(ids: np.ndarray,
+               part: np.ndarray,
+               count: int) -> np.ndarray:
+    # Vertices with other than two neighbours over all parts, each
+    # distinct edge counted once
+    b = np.flatnonzero(part[1:] == part[:-1]) + 1
+    lo = np.minimum(ids[b - 1], ids[b])
+    hi = np.maximum(ids[b - 1], ids[b])
+    edges = np.sort((lo * count + hi)[lo != hi])
+    edges = edges[np.diff(edges, prepend=-1) != 0]
+    degrees = (np.bincount(edges // count, minlength=count)
+               + np.bincount(edges % count, minlength=count))
+    return degrees != 2
+
+
+def _first_of_parts(part: np.ndarray, at: np.ndarray) -> np.ndarray:
+    # The first of positions at, grouped by part, in each part
+    return at[np.diff(part[at], prepend=-1) != 0]
+
+
+def _walks(ids: np.ndarray,
+           part: np.ndarray,
+           first: np.ndarray,
+           lengths: np.ndarray,
+           closed: np.ndarray,
+           junction: np.ndarray) -> np.ndarray:
+    # Positions of every part in the order to walk them: open parts as
+    # they are, rings from their first junction or, without junctions,
+    # their smallest vertex, round to that again
+    local = np.arange(len(ids)) - first[part]
+    inside = closed[part] & (local < lengths[part] - 1)
+
+    start = np.zeros(len(lengths), dtype=np.intp)
+    at = _first_of_parts(part, np.flatnonzero(inside & junction[ids]))
+    start[part[at]] = local[at]
+    plain = closed.copy()
+    plain[part[at]] = False
+
+    at = np.flatnonzero(inside & plain[part])
+    at = _first_of_parts(part, at[np.lexsort((ids[at], part[at]))])
+    start[part[at]] = local[at]
+
+    ring = np.maximum(lengths - 1, 1)[part]
+    return first[part] + np.where(closed[part],
+                                  (start[part] + local) % ring, local)
+
+
+def _orient(seq: np.ndarray,
+            starts: np.ndarray,
+            ends: np.ndarray) -> np.ndarray:
+    # Whether each arc of seq reads lexicographically smaller backwards
+    head, tail = seq[starts], seq[ends]
+    second, before = seq[starts + 1], seq[ends - 1]
+    flipped = np.where(head != tail, tail < head, before < second)
+    for k in np.flatnonzero((head == tail) & (second == before)).tolist():
+        arc = seq[starts[k]:ends[k] + 1]
+        differ = np.flatnonzero(arc != arc[::-1])
+        flipped[k] = len(differ) > 0 and arc[-1 - differ[0]] < arc[differ[0]]
+    return flipped
+
+
+def _ranges(starts: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+    # Concatenated aranges of sizes from starts
+    offsets = np.cumsum(sizes) - sizes
+    return np.arange(sizes.sum()) + np.repeat(starts - offsets, sizes)
+
+
+def _arc_classes(seq: np.ndarray,
+                 starts: np.ndarray,
+                 ends: np.ndarray,
+                 flipped: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Number the distinct arcs, read in their smaller direction. Between
+    # junctions an arc follows from its first two vertices, so arcs are
+    # grouped on those, their last and their length, and then checked.
+    # Returns the class of every arc and the arcs read that way, packed.
+    sizes = ends - starts + 1
+    offsets = np.cumsum(sizes) - sizes
+    forward = _ranges(starts, sizes)
+    backward = _ranges(-ends, sizes)
+    read = seq[np.where(np.repeat(flipped, sizes), -backward, forward)]
+
+    keys = (read[offsets + 1], read[offsets + sizes - 1],
+            read[offsets], sizes)
+    order = np.lexsort(keys)
+    new = np.zeros(len(order), dtype=bool)
+    new[:1] = True
+    for key in keys:
+        new[1:] |= key[order][1:] != key[order][:-1]
+    classes = np.empty(len(order), dtype=np.intp)
+    classes[order] = np.cumsum(new) - 1
+
+    heads = order[new][classes]
+    same = read == read[_ranges(offsets[heads], sizes)]
+    matches = np.logical_and.reduceat(same, offsets) if len(same) else same
+    if not matches.all():
+        classes = _split_classes(read, offsets, sizes, classes, matches)
+    return classes, read
+
+
+def _split_classes(read: np.ndarray,
+                   offsets: np.ndarray,
+                   sizes: np.ndarray,
+                   classes: np.ndarray,
+                   matches: np.ndarray) -> np.ndarray:
+    # Arcs grouped with ones they differ from, which repeated points make
+    # possible, get classes of their own
+    found: Dict[bytes, int] = {}
+    classes = classes.copy()
+    count = classes.max() + 1
+    for a in np.flatnonzero(~matches).tolist():
+        key = read[offsets[a]:offsets[a] + sizes[a]].tobytes()
+        if key not in found:
+            found[key] = count
+            count += 1
+        classes[a] = found[key]
+    return classes
+
+
+def _shared_arcs(arrays: List[np.ndarray],
+                 tolerance: float,
+                 workers: Optional[int],
+                 chunk_size: int) -> List[np.ndarray]:
+    # Indices of the points to keep of every part, simplifying the arcs
+    # between junctions once, however many parts run along them
+    if not arrays:
+        return []
+    lengths = np.array([len(a) for a in arrays], dtype=np.intp)
+    bounds = np.concatenate(([0], np.cumsum(lengths)))
+    first, last = bounds[:-1], bounds[1:] - 1
+    part = np.repeat(np.arange(len(arrays)), lengths)
+    ids, unique = _vertex_ids(np.concatenate([np.empty((0, 2))] + arrays))
+
+    # A part is a ring when it ends where it starts, else its ends are
+    # junctions
+    used = lengths > 0
+    closed = np.zeros(len(arrays), dtype=bool)
+    closed[used] = ((lengths[used] > 1)
+                    & (ids[first[used]] == ids[last[used]]))
+    junction = _junctions(ids, part, len(unique))
+    opened = used & ~closed
+    junction[ids[first[opened]]] = True
+    junction[ids[last[opened]]] = True
+
+    # Arcs run between cuts at junctions and the ends of each walk
+    walk = _walks(ids, part, first, lengths, closed, junction)
+    seq = ids[walk]
+    local = np.arange(len(seq)) - first[part]
+    cuts = np.flatnonzero(junction[seq] | (local == 0)
+                          | (local == lengths[part] - 1))
+    within = part[cuts[:-1]] == part[cuts[1:]]
+    starts, ends = cuts[:-1][within], cuts[1:][within]
+
+    flipped = _orient(seq, starts, ends)
+    classes, read = _arc_classes(seq, starts, ends, flipped)
+    sizes = ends - starts + 1
+    _, heads = np.unique(classes, return_index=True)
+    mask = _reduce_many(unique[read[_ranges((np.cumsum(sizes) - sizes)[heads],
+                                            sizes[heads])]],
+                        sizes[heads], tolerance, workers, chunk_size)
+
+    # Every arc keeps what its class does, read in its own direction. The
+    # ends an arc shares with the next are kept by both.
+    at = np.cumsum(sizes[heads]) - sizes[heads]
+    keep = np.zeros(len(seq), dtype=bool)
+    keep[_ranges(starts, sizes)] = mask[
+        np.where(np.repeat(flipped, sizes),
+                 -_ranges(-(at + sizes[heads] - 1)[classes], sizes),
+                 _ranges(at[classes], sizes))]
+    keep[lengths[part] < 2] = True
+
+    taken = walk[keep] - first[part[keep]]
+    counts = np.bincount(part[keep], minlength=len(arrays))
+    return np.split(taken, np.cumsum(counts)[:-1])
+
+
+def reduce_shapes(shapes: List[List[Points]],
+                  tolerance: float,
+                  workers: Optional[int] = None,
+                  chunk_size: int = 65536,
+                  topology: bool = False) -> List[List[Points]]:
+    """reduce_points on every part of every shape.
+
+    The parts are packed into chunks of about chunk_size points, and each
+    chunk is simplified in one go. With workers above 1 the chunks are
+    shared out to a pool of that many processes, which get the packed
+    coordinates and only send back masks of the points to keep, so the
+    output holds the same objects either way.
+
+    With topology, borders that parts share are simplified once and the
+    same way for all of them, so neighbouring polygons stay gap free.
+    Parts are cut into arcs at junctions, vertices with other than two
+    neighbours over all parts, and at the ends of open parts. A ring,
+    whose first and last point are the same, starts at its first junction
+    in the output, or at its smallest vertex if it has none.
+
+    Topology costs time and is only worth it where parts share borders:
+    it takes about twice as long as without, as every point of every part
+    is sorted to find where parts meet, before the arcs are walked and
+    matched. Without it, a shared border may be simplified differently
+    for each part that runs along it.
+    """
+    parts = [part for shape in shapes for part in shape]
+    arrays = [_as_array(part) for part in parts]
+
+    if topology:
+        taken = iter(_shared_arcs(arrays, tolerance, workers, chunk_size))
+        return [[_select(part, next(taken)) for part in shape]
+                for shape in shapes]
+
+    mask = _reduce_many(np.concatenate([np.empty((0, 2))] + arrays),
+                        np.array([len(a) for a in arrays], dtype=np.intp),
+                        tolerance, workers, chunk_size)
+    out: List[List[Points]] = []
+    start = 0
+    for shape in shapes:
+        reduced = []
+        for part in shape:
+            reduced.append(_select(part, mask[start:start + len(part)]))
+            start += len(part)
+        out.append(reduced)
+    return out
+
+
+def _segment_distances(points: np.ndarray,
+                       segments: np.ndarray) -> np.ndarray:
+    # (M, N) distances of M points to N segments as rows x1, y1, x2, y2
+    ax, ay = segments[:, 0], segments[:, 1]
+    abx, aby = segments[:, 2] - ax, segments[:, 3] - ay
+    length = abx * abx + aby * aby
+
+    dx = points[:, 0, None] - ax
+    dy = points[:, 1, None] - ay
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.where(length > 0, (dx * abx + dy * aby) / length, 0.0)
+    np.clip(t, 0.0, 1.0, out=t)
+    return np.hypot(dx - t * abx, dy - t * aby)
+
+
+def _blocks(rows: int,
+            columns: int,
+            size: int) -> Iterator[Tuple[slice, slice]]:
+    # Tiles of about size cells covering a rows x columns array, a whole
+    # row of columns at a time while that fits
+    width = max(1, min(columns, size))
+    height = max(1, size // width)
+    for top in range(0, rows, height):
+        for left in range(0, columns, width):
+            yield slice(top, top + height), slice(left, left + width)
+
+
+def segment_distances(points: Points,
+                      segments: np.ndarray,
+                      chunk_size: int = 1 << 20) -> np.ndarray:
+    """Distances from M points to N segments as an (M, N) array.
+
+    Segments are given as (N, 4) rows x1, y1, x2, y2, or (N, 2, 2). Unlike
+    pointlinedist, distances are to the nearest point of each segment,
+    not of the line through it. The distances are worked out in blocks of
+    about chunk_size point-segment pairs, to bound the temporaries.
+    """
+    coords = _as_array(points)
+    segments = np.asarray(segments, dtype=np.float64).reshape(-1, 4)
+    out = np.empty((len(coords), len(segments)))
+    for rows, columns in _blocks(len(coords), len(segments), chunk_size):
+        out[rows, columns] = _segment_distances(coords[rows],
+                                                segments[columns])
+    return out
+
+
+def nearest_segment(points: Points,
+                    segments: np.ndarray,
+                    chunk_size: int = 1 << 20
+                    ) -> Tuple[np.ndarray, np.ndarray]:
+    """Distance from each of M points to its nearest of N segments, and
+    the index of that segment, the first one on ties.
+
+    Takes the same arguments as segment_distances, but only ever holds
+    a block of about chunk_size distances, so M x N may exceed memory.
+    """
+    coords = _as_array(points)
+    segments = np.asarray(segments, dtype=np.float64).reshape(-1, 4)
+    if len(segments) == 0:
+        raise ValueError("nearest_segment needs at least one segment")
+
+    distance = np.full(len(coords), np.inf)
+    index = np.zeros(len(coords), dtype=np.intp)
+    for rows, columns in _blocks(len(coords), len(segments), chunk_size):
+        d = _segment_distances(coords[rows], segments[columns])
+        best = np.argmin(d, axis=1)
+        nearest = np.take_along_axis(d, best[:, None], axis=1)[:, 0]
+        # Later blocks only win when strictly nearer, keeping the first
+        closer = nearest < distance[rows]
+        distance[rows] = np.where(closer, nearest, distance[rows])
+        index[rows] = np.where(closer, best + columns.start, index[rows])
+    return distance, index
+
+
+def _triangle_area(x: List[float], y: List[float],
+                   a: int, b: int, c: int) -> float:
+    return abs((x[b] - x[a]) * (y[c] - y[a])
+               - (x[c] - x[a]) * (y[b] - y[a])) / 2
+
+
+def visvalingam_mask(points: Points, area: float) -> np.ndarray:
+    """Visvalingam-Whyatt simplification of a polyline as a boolean mask of
+    the points to keep.
+
+    Points are dropped smallest effective area first, the area of the
+    triangle they make with their neighbours, until every point left spans
+    at least area. A point never gets a smaller area than one dropped
+    before it.
+    """
+    coords = _as_array(points)
+    n = len(coords)
+    if n < 3:
+        return np.ones(n, dtype=bool)
+
+    x, y = coords[:, 0].tolist(), coords[:, 1].tolist()
+    keep = [True] * n
+    prev = list(range(-1, n - 1))
+    after = list(range(1, n + 1))
+    areas = [math.inf] + [_triangle_area(x, y, i - 1, i, i + 1)
+                          for i in range(1, n - 1)] + [math.inf]
+    # Only points that may still go are queued
+    heap = [(a, i) for i, a in enumerate(areas[1:-1], 1) if a < area]
+    heapq.heapify(heap)
+
+    while heap:
+        a, i = heapq.heappop(heap)
+        # Skip entries left behind by an update or removal
+        if a != areas[i] or not keep[i]:
+            continue
+        keep[i] = False
+
+        p, q = prev[i], after[i]
+        after[p], prev[q] = q, p
+        for j in (p, q):
+            if 0 < j < n - 1:
+                areas[j] = max(_triangle_area(x, y, prev[j], j, after[j]), a)
+                if areas[j] < area:
+                    heapq.heappush(heap, (areas[j], j))
+
+    return np.array(keep, dtype=bool)
+
+
+def reduce_visvalingam(points: Points, area: float) -> Points:
+    """Visvalingam-Whyatt simplification of a polyline, returned as the
+    same type it was given."""
+    return _select(points, visvalingam_mask(points, area))
+
+
+def radial_distance(points: Iterable[Vector],
+                    tolerance: float) -> Iterator[Vector]:
+    """Drop points closer than tolerance to the last one kept.
+
+    Consumes the points as they come, holding on to only the last point
+    kept and the last one seen, so it works on endless streams. The last
+    point is always kept.
+    """
+    kept: Optional[Vector] = None
+    last: Optional[Vector] = None
+    for p in points:
+        if kept is None or p.dist(kept) >= tolerance:
+            kept = p
+            last = None
+            yield p
+        else:
+            last = p
+    if last is not None:
+        yield last
+
+
+def reumann_witkam(points: Iterable[Vector],
+                   tolerance: float) -> Iterator[Vector]:
+    """Reumann-Witkam simplification of a stream of points.
+
+    The line through the last kept point and the one after it is followed
+    for as long as the points stay within tolerance of it, then the last
+    point still on it is kept and starts the next line. Memory use does
+    not depend on the length of the stream, and the last point is always
+    kept.
+    """
+    stream = iter(points)
+    kept = next(stream, None)
+    if kept is None:
+        return
+    yield kept
+
+    ahead: Optional[Vector] = None
+    last = kept
+    for p in stream:
+        if ahead is None:
+            # The line needs a second point apart from the first
+            if p.dist(kept) >= EPSILON:
+                ahead = p
+        elif pointlinedist(p, kept, ahead) > tolerance:
+            kept, ahead = last, p
+            yield kept
+        last = p
 
-    return outpoints
+    if last is not kept:
+        yield last
 
 
 def main():
@@ -5,27 +5,51 @@ from gsnlib.constants import EPSILON
 
 
 class Vector:
-    v: List[float]
+    """A point or direction, with x and y and a z that most operations
+    leave out.
+
+    The augmented operators +=, -= and *= change the vector in place
+    rather than binding a new one, so every other reference to it sees
+    the change. They also keep its z, where + and times drop it. Use the
+    binary forms, or clone first, where a vector may be shared.
+    """
+    __slots__ = ('x', 'y', 'z')
+
+    x: float
+    y: float
+    z: float
 
     def __init__(self,
                  x: Union[float, List[float]] = 0.0,
                  y: float = 0.0,
                  z: float = 0.0):
         if isinstance(x, list):
-            self.v = list(x) if len(x) == 3 else list(x) + [0.0, ]
+            self.v = x
         else:
-            self.v = [x, y, z]
+            self.x = x
+            self.y = y
+            self.z = z
 
     @classmethod
     def from_array(cls, v: List[float]):
-        vec = cls()
-        vec.v = list(v) if len(v) == 3 else list(v) + [0.0, ]
+        vec = cls.__new__(cls)
+        vec.x = v[0]
+        vec.y = v[1]
+        vec.z = v[2] if len(v) == 3 else 0.0
         return vec
 
+    @property
+    def v(self) -> List[float]:
+        return [self.x, self.y, self.z]
+
+    @v.setter
+    def v(self, v: List[float]):
+        self.x = v[0]
+        self.y = v[1]
+        self.z = v[2] if len(v) == 3 else 0.0
+
     def __sub__(self, other: "Vector"):
-        return self.from_array([self.x - other.x,
-                                self.y - other.y,
-                                self.z - other.z])
+        return Vector(self.x - other.x, self.y - other.y, self.z - other.z)
 
     def __lt__(self, other: "Vector"):
         return (self.x < other.x - EPSILON
@@ -33,8 +57,9 @@ class Vector:
                     and self.y < other.y - EPSILON))
 
     def dist(self, other: "Vector") -> float:
-        t = self - other
-        return math.sqrt(t.x * t.x + t.y * t.y)
+        dx = self.x - other.x
+        dy = self.y - other.y
+        return math.sqrt(dx * dx + dy * dy)
 
     def translate(self, x: float, y: float, z: float = 0.0):
         self.x += x
@@ -45,32 +70,8 @@ class Vector:
         self.x *= math.cos(a) + -math.sin(a)
         self.y *= math.sin(a) + math.cos(a)
 
-    @property
-    def x(self) -> float:
-        return self.v[0]
-
-    @x.setter
-    def x(self, x: float):
-        self.v[0] = x
-
-    @property
-    def y(self) -> float:
-        return self.v[1]
-
-    @y.setter
-    def y(self, y: float):
-        self.v[1] = y
-
-    @property
-    def z(self) -> float:
-        return self.v[2]
-
-    @z.setter
-    def z(self, z: float):
-        self.v[2] = z
-
     def __repr__(self):
-        return f"Vector({', '.join(str(v) for v in self.v)})"
+        return f"Vector({self.x}, {self.y}, {self.z})"
 
     def clone(self) -> 'Vector':
         return Vector(self.x, self.y)
@@ -120,6 +121,53 @@ class Vector:
                 + (self.y - other.y)
                 * (self.y - other.y))
 
+    def cross(self, other: 'Vector') -> float:
+        return self.x * other.y - self.y * other.x
+
+    dist_sq_to = squared_length_to
+
+    # In-place versions of the operations above, returning self so scratch
+    # vectors can be reused in hot loops. Like the originals they work on
+    # x and y, leaving z as it is, except -= which subtracts z as - does.
+
+    def assign(self, other: 'Vector') -> 'Vector':
+        self.x = other.x
+        self.y = other.y
+        self.z = other.z
+        return self
+
+    def iplus(self, other: 'Vector') -> 'Vector':
+        self.x += other.x
+        self.y += other.y
+        return self
+
+    def iminus(self, other: 'Vector') -> 'Vector':
+        self.x -= other.x
+        self.y -= other.y
+        return self
+
+    def iscale(self, a: float) -> 'Vector':
+        self.x *= a
+        self.y *= a
+        return self
+
+    def ilerp(self, other: 'Vector', t: float) -> 'Vector':
+        self.x += (other.x - self.x) * t
+        self.y += (other.y - self.y) * t
+        return self
+
+    def __iadd__(self, other: 'Vector') -> 'Vector':
+        return self.iplus(other)
+
+    def __isub__(self, other: 'Vector') -> 'Vector':
+        self.x -= other.x
+        self.y -= other.y
+        self.z -= other.z
+        return self
+
+    def __imul__(self, a: float) -> 'Vector':
+        return self.iscale(a)
+
     def __eq__(self, o: object) -> bool:
         if not isinstance(o, Vector):
             return NotImplemented
@@ -0,0 +1,175 @@
+from typing import Iterable, Iterator, List, Union, overload
+
+import numpy as np
+
+from gsnlib.constants import EPSILON
+from gsnlib.vector import Vector
+
+Other = Union['VectorArray', Vector]
+Scalar = Union[float, np.ndarray]
+
+
+class VectorArray:
+    """Many Vectors as rows of a float64 (N, 3) array.
+
+    The operations work on all rows at once and follow Vector: those that
+    build a new vector from x and y (plus, minus, times, ...) leave z at 0,
+    and distances and lengths are measured in the xy plane. Another
+    operand can be a VectorArray of the same length or a single Vector,
+    scalars can be a float or an (N, ) array.
+    """
+
+    def __init__(self, data: Union[np.ndarray, Iterable[List[float]],
+                                   None] = None):
+        if data is None:
+            data = np.empty((0, 3))
+        data = np.asarray(data, dtype=np.float64)
+        if data.ndim != 2 or data.shape[1] not in (2, 3):
+            raise ValueError(f"Expected (N, 2) or (N, 3) data, "
+                             f"not {data.shape}")
+        if data.shape[1] == 2:
+            data = np.hstack((data, np.zeros((len(data), 1))))
+        self.data = data
+
+    @classmethod
+    def from_vectors(cls, vectors: Iterable[Vector]) -> 'VectorArray':
+        return cls(np.array([(v.x, v.y, v.z) for v in vectors],
+                            dtype=np.float64).reshape(-1, 3))
+
+    @classmethod
+    def _xy(cls, x: np.ndarray, y: np.ndarray) -> 'VectorArray':
+        data = np.zeros((len(x), 3))
+        data[:, 0] = x
+        data[:, 1] = y
+        return cls(data)
+
+    def to_vectors(self) -> List[Vector]:
+        return [Vector(x, y, z) for x, y, z in self.data.tolist()]
+
+    def __len__(self):
+        return len(self.data)
+
+    def __iter__(self) -> Iterator[Vector]:
+        return iter(self.to_vectors())
+
+    @overload
+    def __getitem__(self, i: int) -> Vector: ...
+
+    @overload
+    def __getitem__(self, i: Union[slice, np.ndarray]) -> 'VectorArray': ...
+
+    def __getitem__(self, i):
+        if isinstance(i, (int, np.integer)):
+            x, y, z = self.data[i].tolist()
+            return Vector(x, y, z)
+        return VectorArray(self.data[i])
+
+    def __repr__(self):
+        return f"VectorArray({self.data.tolist()})"
+
+    @property
+    def x(self) -> np.ndarray:
+        return self.data[:, 0]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self.data[:, 1]
+
+    @property
+    def z(self) -> np.ndarray:
+        return self.data[:, 2]
+
+    @staticmethod
+    def _rows(other: Other) -> np.ndarray:
+        if isinstance(other, Vector):
+            return np.array([other.x, other.y, other.z])
+        return other.data
+
+    def __sub__(self, other: Other) -> 'VectorArray':
+        return VectorArray(self.data - self._rows(other))
+
+    def clone(self) -> 'VectorArray':
+        return self._xy(self.x, self.y)
+
+    def copy(self) -> 'VectorArray':
+        return self.clone()
+
+    def negated(self) -> 'VectorArray':
+        return self._xy(-self.x, -self.y)
+
+    def plus(self, other: Other) -> 'VectorArray':
+        rows = self._rows(other)
+        return self._xy(self.x + rows[..., 0], self.y + rows[..., 1])
+
+    def __add__(self, other: Other) -> 'VectorArray':
+        return self.plus(other)
+
+    def minus(self, other: Other) -> 'VectorArray':
+        rows = self._rows(other)
+        return self._xy(self.x - rows[..., 0], self.y - rows[..., 1])
+
+    def times(self, a: Scalar) -> 'VectorArray':
+        return self._xy(self.x * a, self.y * a)
+
+    def divide_by(self, a: Scalar) -> 'VectorArray':
+        return self._xy(self.x / a, self.y / a)
+
+    def __truediv__(self, a: Scalar) -> 'VectorArray':
+        return self.divide_by(a)
+
+    def dot(self, other: Other) -> np.ndarray:
+        rows = self._rows(other)
+        return self.x * rows[..., 0] + self.y * rows[..., 1]
+
+    def lerp(self, other: Other, t: Scalar) -> 'VectorArray':
+        rows = self._rows(other)
+        return self._xy(self.x + (rows[..., 0] - self.x) * t,
+                        self.y + (rows[..., 1] - self.y) * t)
+
+    def length(self) -> np.ndarray:
+        return np.sqrt(self.dot(self))
+
+    def mag(self) -> np.ndarray:
+        return self.length()
+
+    def unit(self) -> 'VectorArray':
+        return self.divide_by(self.length())
+
+    def dist(self, other: Other) -> np.ndarray:
+        rows = self._rows(other)
+        return np.sqrt((self.x - rows[..., 0]) ** 2
+                       + (self.y - rows[..., 1]) ** 2)
+
+    def squared_length_to(self, other: Other) -> np.ndarray:
+        rows = self._rows(other)
+        return ((self.x - rows[..., 0]) ** 2
+                + (self.y - rows[..., 1]) ** 2)
+
+    def argsort(self) -> np.ndarray:
+        """Stable order of the rows by Vector.__lt__: by x, then y, with
+        values closer than EPSILON counting as equal."""
+        if len(self) == 0:
+            return np.empty(0, dtype=np.intp)
+
+        # Runs of x closer than EPSILON to the previous one tie on x
+        by_x = np.argsort(self.x, kind='stable')
+        steps = np.diff(self.x[by_x]) >= EPSILON
+        x_rank = np.empty(len(self), dtype=np.intp)
+        x_rank[by_x] = np.concatenate(([0], np.cumsum(steps)))
+
+        # The same for y within each of those
+        by_xy = np.lexsort((self.y, x_rank))
+        steps = ((np.diff(self.y[by_xy]) >= EPSILON)
+                 | (np.diff(x_rank[by_xy]) != 0))
+        rank = np.empty(len(self), dtype=np.intp)
+        rank[by_xy] = np.concatenate(([0], np.cumsum(steps)))
+
+        return np.argsort(rank, kind='stable')
+
+    def sorted(self) -> 'VectorArray':
+        return self[self.argsort()]
+
+    def __eq__(self, o: object) -> bool:
+        if not isinstance(o, VectorArray):
+            return NotImplemented
+        return bool(np.array_equal(self.data, o.data))
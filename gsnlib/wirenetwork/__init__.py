@@ -1,13 +1,24 @@
-from dataclasses import dataclass
-from typing import Any, Callable, Dict, List, TypedDict, Union
+from typing import (Any, Callable, Dict, Iterable, Iterator, List,
+                    MutableMapping, Optional, Sequence, Set, TypedDict,
+                    Union)
+import numpy as np
 from gsnlib.vector import Vector
 from .line import Line
+from .index import EdgeIndex, VertexGrid, sweep_pairs
+from .batch import POINT, line_intersections
+from .storage import Edge, EdgeArray, EdgeKey, VertexArray
+from .binary import PathType, read_network, write_network
+from .graph import Graph
+from .strokes import pen_travel, plot_order  # noqa
 from typing import Tuple
 
 from gsnlib.constants import EPSILON
 
 SegmentType = Tuple[Vector, Vector]
 
+# Candidate count above which add_edge tests them with the NumPy kernel
+BATCH_SIZE = 32
+
 
 def line_intersect_1d(a: float, b: float, c: float, d: float):
     if a > b:
@@ -62,10 +73,31 @@ def line_intersection(a: Vector,
     return None
 
 
-@dataclass
-class Edge:
-    a: int
-    b: int
+def _hits(ab: np.ndarray,
+          cd: np.ndarray) -> Iterator[Tuple[int, List[Vector]]]:
+    # Rows of segments a-b, c-d that meet, with the points they share
+    kind, points = line_intersections(ab[:, 0], ab[:, 1], cd[:, 0], cd[:, 1])
+    for k in np.flatnonzero(kind).tolist():
+        left, right = points[k].tolist()
+        if kind[k] == POINT:
+            yield k, [Vector(left), ]
+        else:
+            yield k, [Vector(left), Vector(right)]
+
+
+def _sweep_hits(ends: np.ndarray) -> List[List[Vector]]:
+    # Points where each of the N x 2 x 2 segments meets the others, from
+    # one sweep over x
+    splits: List[List[Vector]] = [[] for _ in ends]
+    boxes = [(min(a[0], b[0]), min(a[1], b[1]),
+              max(a[0], b[0]), max(a[1], b[1])) for a, b in ends.tolist()]
+    pairs = np.array(list(sweep_pairs(boxes, EPSILON)),
+                     dtype=np.intp).reshape(-1, 2)
+    for k, points in _hits(ends[pairs[:, 0]], ends[pairs[:, 1]]):
+        i, j = pairs[k]
+        splits[i] += points
+        splits[j] += points
+    return splits
 
 
 class NetworkData(TypedDict, total=False):
@@ -75,25 +107,123 @@ class NetworkData(TypedDict, total=False):
 
 class WireNetwork:
     _segment_queue: List[SegmentType]
-
-    def __init__(self, tolerance: float = 0.1):
-        self._vertices: List[Vector] = []
-        self._edges: List[Edge] = []
+    _vertices: Union[List[Vector], VertexArray]
+    _edges: MutableMapping[EdgeKey, Edge]
+
+    def __init__(self, tolerance: float = 0.1, compact: bool = False):
+        """With compact set, vertices and edges are kept in NumPy arrays
+        rather than as Vector and Edge objects."""
+        self.compact = compact
+        self._vertices = VertexArray() if compact else []
+        # Edges keyed on (lowest, highest) vertex index, in insertion order
+        self._edges = EdgeArray() if compact else {}
         self.tolerance = tolerance
         self._segment_queue = []
+        self._queued: Set[Tuple[float, ...]] = set()
+
+    @property
+    def tolerance(self) -> float:
+        return self._tolerance
+
+    @tolerance.setter
+    def tolerance(self, tolerance: float):
+        # Grid cells must be as wide as the tolerance to find every match
+        self._tolerance = tolerance
+        self.drop_indexes()
+
+    def drop_indexes(self):
+        """Free the vertex grid, edge index and adjacency map.
+
+        They are rebuilt in one pass the next time an edit or query needs
+        them, so a loaded or finished network only holds its vertices and
+        edges.
+        """
+        self._indexed = False
+        self._graph: Optional[Graph] = None
+        self._vertex_grid = VertexGrid(self._tolerance)
+        self._edge_index = EdgeIndex(self._tolerance)
+        self._adjacency: Dict[int, Set[int]] = {}
+
+    def _build_indexes(self):
+        coords = self._vertex_coords()
+        self._vertex_grid.build(coords)
+        self._edge_index.build((key, coords[key[0]], coords[key[1]])
+                               for key in self._edges)
+        self._adjacency = {}
+        for a, b in self._edges:
+            self._adjacency.setdefault(a, set()).add(b)
+            self._adjacency.setdefault(b, set()).add(a)
+        self._indexed = True
+
+    def _vertex_coords(self) -> List[List[float]]:
+        if isinstance(self._vertices, VertexArray):
+            return self._vertices.data.tolist()
+        return [[v.x, v.y] for v in self._vertices]
 
     def to_dict(self):
+        if isinstance(self._edges, EdgeArray):
+            edges = self._edges.data.tolist()
+        else:
+            edges = [[e.a, e.b] for e in self._edges.values()]
         return {
-            'vertices': [[v.x, v.y] for v in self._vertices],
-            'edges': [[e.a, e.b] for e in self._edges]
+            'vertices': self._vertex_coords(),
+            'edges': edges
         }
 
     def from_dict(self, data: NetworkData):
         if 'edges' in data:
-            self._edges = [Edge(e[0], e[1]) for e in data['edges']]
+            if self.compact:
+                self._edges = EdgeArray(np.array(data['edges'],
+                                                 dtype=np.int32))
+            else:
+                edges = [Edge(e[0], e[1]) for e in data['edges']]
+                self._edges = {self._edge_key(e): e for e in edges}
 
         if 'vertices' in data:
-            self._vertices = [Vector(v) for v in data['vertices']]
+            if self.compact:
+                self._vertices = VertexArray.from_array(data['vertices'])
+            else:
+                self._vertices = [Vector(v) for v in data['vertices']]
+
+        self.drop_indexes()
+
+    def save(self, path: PathType, meta: Optional[Dict[str, Any]] = None):
+        """Write the network in the binary format of wirenetwork.binary,
+        with an optional JSON-serialisable dict of metadata."""
+        vertices, edges = self.to_numpy()
+        write_network(path, vertices, edges, self.tolerance, meta)
+
+    @classmethod
+    def load(cls, path: PathType,
+             mmap: bool = True,
+             compact: bool = True) -> 'WireNetwork':
+        """Read a network written by save.
+
+        A compact network works directly on the loaded arrays, and with
+        mmap those map the file, so loading takes the same time whatever
+        its size. The indexes are rebuilt on the first edit.
+        """
+        header, vertices, edges = read_network(path, mmap=mmap and compact)
+        return cls.from_numpy(vertices, edges, header['tolerance'], compact)
+
+    @classmethod
+    def from_numpy(cls, vertices: np.ndarray, edges: np.ndarray,
+                   tolerance: float = 0.1,
+                   compact: bool = True) -> 'WireNetwork':
+        """Network of float64 (N, 2) vertices and int32 (M, 2) edges, as
+        returned by to_numpy. A compact network uses the arrays as its
+        storage without copying them, when they already have those types;
+        others are converted, so that later edits are not truncated."""
+        network = cls(tolerance=tolerance, compact=compact)
+        vertices = np.asanyarray(vertices).astype(np.float64, copy=False)
+        edges = np.asanyarray(edges).astype(np.int32, copy=False)
+        if compact:
+            network._vertices = VertexArray(vertices)
+            network._edges = EdgeArray.wrap(edges)
+        else:
+            network.from_dict({'vertices': vertices.tolist(),
+                               'edges': edges.tolist()})
+        return network
 
     def add_segment(self, p1: List[float], p2: List[float]):
         self.add_to_segment_queue((Vector.from_array(p1),
@@ -101,8 +231,55 @@ class WireNetwork:
 
         while len(self._segment_queue) > 0:
             _p1, _p2 = self._segment_queue.pop()
+            self._queued.discard(self._segment_key((_p1, _p2)))
             self.add_edge(_p1, _p2)
 
+    def add_segments(self,
+                     segments: Union[np.ndarray, Iterable[Sequence[float]]]):
+        """Add many segments in one pass.
+
+        Takes an N x 4 array, or an iterable of rows, of x1, y1, x2, y2.
+        Intersections among the new segments are found in one sweep over
+        x, and against existing edges through the edge index. Every segment
+        is then split at its intersection points, with the pieces snapped
+        to vertices as in add_segment.
+
+        Unlike repeated add_segment calls, the result does not depend on the
+        order of the segments when some of them overlap.
+        """
+        data = np.asarray(segments, dtype=float).reshape(-1, 4)
+
+        segs: List[SegmentType] = []
+        for x1, y1, x2, y2 in data.tolist():
+            p1, p2 = Vector(x1, y1), Vector(x2, y2)
+            if p2 < p1:
+                p1, p2 = p2, p1
+            if p1.dist(p2) >= self.tolerance:
+                segs.append((p1, p2))
+
+        ends = np.array([[[p1.x, p1.y], [p2.x, p2.y]] for p1, p2 in segs],
+                        dtype=float).reshape(-1, 2, 2)
+        splits = _sweep_hits(ends)
+        split_edges = self._edge_hits(ends, splits)
+
+        pieces: List[Tuple[Vector, Vector, List[Vector]]] = []
+        for other, points in split_edges.values():
+            pieces.append((self._vertices[other.a],
+                           self._vertices[other.b],
+                           points))
+            self._remove_edge(other)
+        pieces += [(p1, p2, points)
+                   for (p1, p2), points in zip(segs, splits)]
+
+        for p1, p2, points in pieces:
+            points = sorted(points, key=p1.dist)
+            prev = self.add_vertex(p1)
+            for p in points + [p2, ]:
+                px = self.add_vertex(p)
+                if prev is not None and px is not None and px != prev:
+                    self._add_edge(Edge(prev, px))
+                prev = px
+
     def add_to_segment_queue(self, seg: SegmentType):
         p1, p2 = seg
 
@@ -115,40 +292,139 @@ class WireNetwork:
 
         # Check if segment exists
         if p1_i is not None and p2_i is not None:
-            for edge in self._edges:
-                if edge == Edge(p1_i, p2_i):
-                    return
+            edge = self._edges.get(self._edge_key(Edge(p1_i, p2_i)))
+            if edge is not None and edge == Edge(p1_i, p2_i):
+                return
 
         # Check length of segment
         if p1.dist(p2) < self.tolerance:
             return
 
         # Check if segment already in queue
-        for queued_segment in self._segment_queue:
-            if queued_segment == seg:
-                return
+        key = self._segment_key(seg)
+        if key in self._queued:
+            return
 
         # Add segment to queue
         self._segment_queue.append(seg)
+        self._queued.add(key)
+
+    @staticmethod
+    def _segment_key(seg: SegmentType) -> Tuple[float, ...]:
+        return (seg[0].x, seg[0].y, seg[0].z, seg[1].x, seg[1].y, seg[1].z)
 
     def add_vertex(self, Vector: Vector, add: bool = True) -> Union[int, None]:
-        for i, v in enumerate(self.vertices):
-            if v.dist(Vector) < self.tolerance:
-                return i
+        # Lowest index wins, as if scanning the vertices in order
+        if not self._indexed:
+            self._build_indexes()
+
+        found: Union[int, None] = None
+        for i in self._vertex_grid.nearby(Vector.x, Vector.y):
+            if found is not None and i > found:
+                continue
+            if self._vertices[i].dist(Vector) < self.tolerance:
+                found = i
+
+        if found is not None:
+            return found
 
         if add:
+            self._graph = None
             self._vertices.append(Vector)
+            self._vertex_grid.insert(len(self._vertices) - 1,
+                                     Vector.x, Vector.y)
             return len(self._vertices) - 1
         else:
             return None
 
+    @staticmethod
+    def _edge_key(e: Edge) -> EdgeKey:
+        return (e.a, e.b) if e.a < e.b else (e.b, e.a)
+
     def _add_edge(self, e: Edge):
-        for other in self._edges:
-            if e.a == other.a and e.b == other.b:
-                return
-            if e.a == other.b and e.b == other.a:
-                return
-        self._edges.append(e)
+        if not self._indexed:
+            self._build_indexes()
+
+        key = self._edge_key(e)
+        if key in self._edges:
+            return
+        self._edges[key] = e
+        self._graph = None
+        self._adjacency.setdefault(e.a, set()).add(e.b)
+        self._adjacency.setdefault(e.b, set()).add(e.a)
+        self._edge_index.insert(key,
+                                self._vertices[e.a], self._vertices[e.b])
+
+    def _remove_edge(self, e: Edge):
+        if not self._indexed:
+            self._build_indexes()
+
+        key = self._edge_key(e)
+        del self._edges[key]
+        self._graph = None
+        self._adjacency[e.a].discard(e.b)
+        self._adjacency[e.b].discard(e.a)
+        self._edge_index.remove(key)
+
+    def has_edge(self, a: int, b: int) -> bool:
+        return ((a, b) if a < b else (b, a)) in self._edges
+
+    def neighbours(self, i: int) -> Set[int]:
+        if not self._indexed:
+            self._build_indexes()
+        return self._adjacency.get(i, set())
+
+    def _edge_candidates(self, p1: Vector, p2: Vector) -> List[Edge]:
+        # Only edges whose bounding box touches p1-p2 can intersect it
+        if not self._indexed:
+            self._build_indexes()
+        return [self._edges[key]
+                for key in self._edge_index.query(p1, p2, EPSILON)]
+
+    def _edge_hits(self, ends: np.ndarray, splits: List[List[Vector]]
+                   ) -> Dict[EdgeKey, Tuple[Edge, List[Vector]]]:
+        # Existing edges the N x 2 x 2 segments meet, with the points on
+        # them, adding the points to the splits of the segments
+        split_edges: Dict[EdgeKey, Tuple[Edge, List[Vector]]] = {}
+        found = [(i, other) for i, (p1, p2) in enumerate(ends.tolist())
+                 for other in self._edge_candidates(Vector(*p1),
+                                                    Vector(*p2))]
+        others = self._edge_ends([other for _, other in found])
+        for k, points in _hits(ends[[i for i, _ in found]], others):
+            i, other = found[k]
+            splits[i] += points
+            key = self._edge_key(other)
+            if key not in split_edges:
+                split_edges[key] = (other, [])
+            split_edges[key][1].extend(points)
+        return split_edges
+
+    def _edge_ends(self, edges: List[Edge]) -> np.ndarray:
+        return np.array([[[self._vertices[e.a].x, self._vertices[e.a].y],
+                          [self._vertices[e.b].x, self._vertices[e.b].y]]
+                         for e in edges], dtype=float).reshape(-1, 2, 2)
+
+    def _intersections(self, p1: Vector, p2: Vector, edges: List[Edge]
+                       ) -> List[Union[SegmentType, Vector, None]]:
+        ends: List[SegmentType] = []
+        for other in edges:
+            p3, p4 = self._vertices[other.a], self._vertices[other.b]
+            ends.append((p4, p3) if p4 < p3 else (p3, p4))
+
+        if len(edges) < BATCH_SIZE:
+            return [line_intersection(p1, p2, p3, p4) for p3, p4 in ends]
+
+        kind, points = line_intersections(
+            [p1.x, p1.y], [p2.x, p2.y],
+            [[p3.x, p3.y] for p3, _ in ends], [[p4.x, p4.y] for _, p4 in ends])
+        result = [None] * len(edges)
+        for k in np.flatnonzero(kind).tolist():
+            left, right = points[k].tolist()
+            if kind[k] == POINT:
+                result[k] = Vector(left)
+            else:
+                result[k] = (Vector(left), Vector(right))
+        return result
 
     def add_edge(self, p1: Vector, p2: Vector):
         # Loop through all existing Vectors, checking
@@ -161,13 +437,13 @@ class WireNetwork:
         intersections: List[Tuple[Edge, Vector]] = []
         new_edges: List[Any] = []
         clear = True
-        for other in self._edges:
+        candidates = self._edge_candidates(p1, p2)
+        for other, i in zip(candidates,
+                            self._intersections(p1, p2, candidates)):
             p3, p4 = self._vertices[other.a], self._vertices[other.b]
             if p4 < p3:
                 p3, p4 = p4, p3
 
-            i = line_intersection(p1, p2, p3, p4)
-
             if i is not None:
                 clear = False
                 if isinstance(i, Vector):
@@ -200,7 +476,7 @@ class WireNetwork:
                     else:
                         # Overlap
                         if p1.x < p3.x:
-                            self._edges.remove(other)
+                            self._remove_edge(other)
                             self.add_to_segment_queue(
                                 (p1, self._vertices[other.a]))
                             self.add_to_segment_queue(
@@ -208,7 +484,7 @@ class WireNetwork:
                             self.add_to_segment_queue(
                                 (p2, self._vertices[other.b]))
                         else:
-                            self._edges.remove(other)
+                            self._remove_edge(other)
                             self.add_to_segment_queue(
                                 (self._vertices[other.a], p1))
                             self.add_to_segment_queue(
@@ -232,7 +508,7 @@ class WireNetwork:
             px_i: List[int] = []
 
             for other, p0 in intersections:
-                self._edges.remove(other)
+                self._remove_edge(other)
                 p3_i = other.a
                 p4_i = other.b
                 p0_i = self.add_vertex(p0)
@@ -268,20 +544,46 @@ class WireNetwork:
             self._add_edge(edge)
 
     def check_edges(self):
-        for edge_a in self.edges:
-            for edge_b in self.edges[1:]:
-                p1 = self._vertices[edge_a.a]
-                p2 = self._vertices[edge_a.b]
-                p3 = self._vertices[edge_b.a]
-                p4 = self._vertices[edge_b.b]
+        ends = self._edge_ends(self.edges)
+        boxes = [(min(a[0], b[0]), min(a[1], b[1]),
+                  max(a[0], b[0]), max(a[1], b[1])) for a, b in ends.tolist()]
+        pairs = np.array(list(sweep_pairs(boxes, EPSILON)),
+                         dtype=np.intp).reshape(-1, 2)
+
+        p1, p2 = ends[pairs[:, 0], 0], ends[pairs[:, 0], 1]
+        p3, p4 = ends[pairs[:, 1], 0], ends[pairs[:, 1], 1]
+        kind, points = line_intersections(p1, p2, p3, p4)
+        crossing = np.flatnonzero(kind == POINT)
+        if len(crossing) > 0:
+            raise Exception(Vector(points[crossing[0], 0].tolist()))
+
+    def to_numpy(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Vertices as a float64 (N, 2) array and edges as an int32 (M, 2)
+        array. For a compact network these are views of its storage."""
+        if isinstance(self._vertices, VertexArray):
+            vertices = self._vertices.data
+        else:
+            vertices = np.array(self._vertex_coords(),
+                                dtype=np.float64).reshape(-1, 2)
+
+        if isinstance(self._edges, EdgeArray):
+            edges = self._edges.data
+        else:
+            edges = np.array([[e.a, e.b] for e in self._edges.values()],
+                             dtype=np.int32).reshape(-1, 2)
+
+        return vertices, edges
 
-                li = line_intersection(p1, p2, p3, p4)
-                if li is not None and type(li) == Vector:
-                    raise Exception(li)
+    def graph(self) -> Graph:
+        """CSR adjacency for graph queries, edge ids being positions in
+        edges. It is built once and kept until the network changes."""
+        if self._graph is None:
+            self._graph = Graph(*self.to_numpy())
+        return self._graph
 
     @property
-    def edges(self):
-        return self._edges
+    def edges(self) -> List[Edge]:
+        return list(self._edges.values())
 
     @property
     def vertices(self):
@@ -0,0 +1,99 @@
+from typing import Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+from gsnlib.constants import EPSILON
+
+NONE = 0
+POINT = 1
+OVERLAP = 2
+
+
+def _line(p: np.ndarray, q: np.ndarray):
+    # Same normalised line equation as wirenetwork.line.Line
+    a = p[..., 1] - q[..., 1]
+    b = q[..., 0] - p[..., 0]
+    c = -a * p[..., 0] - b * p[..., 1]
+    z = np.sqrt(a * a + b * b)
+    z = np.where(np.abs(z) > EPSILON, z, 1.0)
+    return a / z, b / z, c / z
+
+
+def _overlap_1d(a: np.ndarray, b: np.ndarray, c: np.ndarray, d: np.ndarray):
+    return (np.maximum(np.minimum(a, b), np.minimum(c, d))
+            <= np.minimum(np.maximum(a, b), np.maximum(c, d)) + EPSILON)
+
+
+def _betw(left: np.ndarray, right: np.ndarray, x: np.ndarray):
+    return ((np.minimum(left, right) <= x + EPSILON)
+            & (x <= np.maximum(left, right) + EPSILON))
+
+
+def _less(p: np.ndarray, q: np.ndarray):
+    # Vector.__lt__
+    return ((p[..., 0] < q[..., 0] - EPSILON)
+            | ((np.abs(p[..., 0] - q[..., 0]) < EPSILON)
+               & (p[..., 1] < q[..., 1] - EPSILON)))
+
+
+def line_intersections(a: npt.ArrayLike,
+                       b: npt.ArrayLike,
+                       c: npt.ArrayLike,
+                       d: npt.ArrayLike) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorised line_intersection of segments a-b and c-d.
+
+    Takes arrays of points with shape (..., 2) that broadcast against
+    each other, so one segment can be tested against many, row against
+    row, or every segment against every other with a[:, None] and
+    c[None, :].
+
+    Returns the kind of each intersection (NONE, POINT or OVERLAP) and an
+    array of shape (..., 2, 2). A POINT has its coordinates in both rows,
+    an OVERLAP is the shared stretch from left to right.
+    """
+    a, b, c, d = np.broadcast_arrays(*(np.asarray(p, dtype=float)[..., :2]
+                                       for p in (a, b, c, d)))
+    shape = a.shape[:-1]
+
+    kind = np.full(shape, NONE, dtype=np.int8)
+    points = np.zeros(shape + (2, 2))
+
+    near = (_overlap_1d(a[..., 0], b[..., 0], c[..., 0], d[..., 0])
+            & _overlap_1d(a[..., 1], b[..., 1], c[..., 1], d[..., 1]))
+
+    ma, mb, mc = _line(a, b)
+    na, nb, nc = _line(c, d)
+    zn = ma * nb - mb * na
+    parallel = np.abs(zn) < EPSILON
+
+    # Collinear, overlapping segments
+    collinear = (near & parallel
+                 & (np.abs(ma * c[..., 0] + mb * c[..., 1] + mc) <= EPSILON)
+                 & (np.abs(na * a[..., 0] + nb * a[..., 1] + nc) <= EPSILON))
+    swap = _less(b, a)[..., None]
+    a, b = np.where(swap, b, a), np.where(swap, a, b)
+    swap = _less(d, c)[..., None]
+    c, d = np.where(swap, d, c), np.where(swap, c, d)
+    left = np.where(_less(a, c)[..., None], c, a)
+    right = np.where(_less(d, b)[..., None], d, b)
+
+    kind[collinear] = OVERLAP
+    points[..., 0, :] = np.where(collinear[..., None], left, 0.0)
+    points[..., 1, :] = np.where(collinear[..., None], right, 0.0)
+
+    # Crossing segments
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x = -(mc * nb - mb * nc) / zn
+        y = -(ma * nc - mc * na) / zn
+    crossing = (near & ~parallel
+                & _betw(a[..., 0], b[..., 0], x)
+                & _betw(a[..., 1], b[..., 1], y)
+                & _betw(c[..., 0], d[..., 0], x)
+                & _betw(c[..., 1], d[..., 1], y))
+
+    kind[crossing] = POINT
+    xy = np.stack((x, y), axis=-1)[..., None, :]
+    points[crossing] = np.broadcast_to(xy, shape + (2, 2))[crossing]
+
+    return kind, points
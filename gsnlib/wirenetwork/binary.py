@@ -0,0 +1,94 @@
+"""Binary file format for wire networks.
+
+A file starts with an 8 byte magic string and the length of a JSON
+header as a little-endian uint32. After the header, padded to 8 bytes,
+come the vertices as little-endian float64 x, y pairs and the edges as
+little-endian int32 a, b pairs. Both buffers can be memory-mapped as is.
+"""
+import json
+import struct
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+import numpy as np
+
+MAGIC = b'GSNWIRE\x00'
+VERSION = 1
+
+VERTEX_DTYPE = np.dtype('<f8')
+EDGE_DTYPE = np.dtype('<i4')
+
+PathType = Union[str, Path]
+
+
+def write_network(path: PathType,
+                  vertices: np.ndarray,
+                  edges: np.ndarray,
+                  tolerance: float,
+                  meta: Optional[Dict[str, Any]] = None):
+    vertices = np.ascontiguousarray(vertices, dtype=VERTEX_DTYPE)
+    edges = np.ascontiguousarray(edges, dtype=EDGE_DTYPE)
+
+    header = json.dumps({
+        'version': VERSION,
+        'tolerance': tolerance,
+        'vertices': len(vertices),
+        'edges': len(edges),
+        'meta': meta or {},
+    }).encode('utf-8')
+    header += b' ' * (-(len(MAGIC) + 4 + len(header)) % 8)
+
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header)))
+        f.write(header)
+        f.write(vertices.tobytes())
+        f.write(edges.tobytes())
+
+
+def read_header(path: PathType) -> Tuple[Dict[str, Any], int]:
+    """The header of a network file, and the offset of the vertex data."""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a wire network file")
+        length, = struct.unpack('<I', f.read(4))
+        header = json.loads(f.read(length).decode('utf-8'))
+
+    if header.get('version') != VERSION:
+        raise ValueError(f"Unsupported wire network version "
+                         f"{header.get('version')} in {path}")
+
+    return header, len(MAGIC) + 4 + length
+
+
+def read_network(path: PathType, mmap: bool = True
+                 ) -> Tuple[Dict[str, Any], np.ndarray, np.ndarray]:
+    """Header, vertices and edges of a network file.
+
+    With mmap, the arrays are copy-on-write maps of the file, so nothing
+    is read until it is used and changes never reach the file.
+    """
+    header, offset = read_header(path)
+    n, m = header['vertices'], header['edges']
+    edge_offset = offset + n * 2 * VERTEX_DTYPE.itemsize
+
+    if not mmap:
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            vertices = np.fromfile(f, dtype=VERTEX_DTYPE, count=n * 2)
+            edges = np.fromfile(f, dtype=EDGE_DTYPE, count=m * 2)
+        return header, vertices.reshape(n, 2), edges.reshape(m, 2)
+
+    # np.memmap refuses zero-length maps
+    if n > 0:
+        vertices = np.memmap(path, dtype=VERTEX_DTYPE, mode='c',
+                             offset=offset, shape=(n, 2))
+    else:
+        vertices = np.empty((0, 2), dtype=VERTEX_DTYPE)
+    if m > 0:
+        edges = np.memmap(path, dtype=EDGE_DTYPE, mode='c',
+                          offset=edge_offset, shape=(m, 2))
+    else:
+        edges = np.empty((0, 2), dtype=EDGE_DTYPE)
+
+    return header, vertices, edges
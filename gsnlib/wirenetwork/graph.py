@@ -0,0 +1,172 @@
+import heapq
+import math
+from typing import List, Tuple
+
+import numpy as np
+
+
+def _cut_circuit(circuit: List[Tuple[int, int]],
+                 m: int) -> List[List[int]]:
+    # Trails of a closed circuit of (vertex, edge it was reached by),
+    # cut at the virtual edges, those numbered m and up
+    cuts = [k for k, (_, eid) in enumerate(circuit) if eid >= m]
+    if not cuts:
+        return [[v for v, _ in circuit]]
+
+    # Rotate the circuit to begin just after a virtual edge
+    circuit = circuit[cuts[0]:] + circuit[1:cuts[0]]
+    trails: List[List[int]] = []
+    trail = [circuit[0][0], ]
+    for v, eid in circuit[1:]:
+        if eid >= m:
+            trails.append(trail)
+            trail = [v, ]
+        else:
+            trail.append(v)
+    trails.append(trail)
+    return trails
+
+
+class Graph:
+    """Compressed sparse row adjacency of a wire network.
+
+    The neighbours of vertex i are indices[indptr[i]:indptr[i + 1]], and
+    edge_ids holds the row in the edge array each of those slots came from.
+    Every edge is listed once from each end.
+    """
+
+    def __init__(self, vertices: np.ndarray, edges: np.ndarray):
+        vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 2)
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        n, m = len(vertices), len(edges)
+
+        src = np.concatenate((edges[:, 0], edges[:, 1]))
+        dst = np.concatenate((edges[:, 1], edges[:, 0]))
+        ids = np.concatenate((np.arange(m), np.arange(m)))
+        order = np.argsort(src, kind='stable')
+
+        self.vertices = vertices
+        self.edges = edges
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=self.indptr[1:])
+        self.indices = dst[order]
+        self.edge_ids = ids[order]
+        self.lengths = np.hypot(*(vertices[edges[:, 1]]
+                                  - vertices[edges[:, 0]]).T)
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    def neighbours(self, i: int) -> np.ndarray:
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def degrees(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def connected_components(self) -> np.ndarray:
+        """Component label of every vertex, numbered from 0 in order of
+        their lowest vertex."""
+        indptr = self.indptr.tolist()
+        indices = self.indices.tolist()
+        labels = [-1] * len(self)
+
+        count = 0
+        for start in range(len(self)):
+            if labels[start] >= 0:
+                continue
+            labels[start] = count
+            stack = [start, ]
+            while stack:
+                v = stack.pop()
+                for u in indices[indptr[v]:indptr[v + 1]]:
+                    if labels[u] < 0:
+                        labels[u] = count
+                        stack.append(u)
+            count += 1
+
+        return np.array(labels, dtype=np.int64)
+
+    def shortest_path(self, source: int, target: int
+                      ) -> Tuple[float, List[int]]:
+        """Length and vertices of the shortest path from source to target,
+        along edges weighted by their length, or (inf, []) if there is
+        none."""
+        indptr = self.indptr.tolist()
+        indices = self.indices.tolist()
+        weights = self.lengths[self.edge_ids].tolist()
+
+        dist = {source: 0.0}
+        previous = {source: source}
+        queue = [(0.0, source)]
+        while queue:
+            d, v = heapq.heappop(queue)
+            if v == target:
+                path = [v, ]
+                while v != source:
+                    v = previous[v]
+                    path.append(v)
+                return d, path[::-1]
+            if d > dist[v]:
+                continue
+            for k in range(indptr[v], indptr[v + 1]):
+                u = indices[k]
+                du = d + weights[k]
+                if du < dist.get(u, math.inf):
+                    dist[u] = du
+                    previous[u] = v
+                    heapq.heappush(queue, (du, u))
+
+        return math.inf, []
+
+    def eulerian_trails(self) -> List[List[int]]:
+        """Cover every edge exactly once with as few trails as possible.
+
+        Each trail is a list of vertices, consecutive ones joined by an
+        edge. A connected part with 2k odd-degree vertices needs k trails,
+        one without any is covered by a single closed trail.
+        """
+        m = len(self.edges)
+        degrees = self.degrees()
+        labels = self.connected_components()
+
+        # Pair up odd vertices within each component with virtual edges,
+        # then every component has an Euler circuit to cut at them.
+        odd = np.flatnonzero(degrees % 2 == 1)
+        odd = odd[np.argsort(labels[odd], kind='stable')]
+        virtual = odd.reshape(-1, 2)
+
+        adjacency: List[List[Tuple[int, int]]] = [[]
+                                                  for _ in range(len(self))]
+        for eid, (a, b) in enumerate(self.edges.tolist()
+                                     + virtual.tolist()):
+            adjacency[a].append((b, eid))
+            if a != b:
+                adjacency[b].append((a, eid))
+
+        used = [False] * (m + len(virtual))
+        position = [0] * len(self)
+        trails: List[List[int]] = []
+
+        starts = virtual[:, 0].tolist() + np.flatnonzero(degrees).tolist()
+        for start in starts:
+            # Hierholzer, recording the edge each vertex was reached by
+            circuit: List[Tuple[int, int]] = []
+            stack = [(start, -1)]
+            while stack:
+                v, arrived = stack[-1]
+                edges = adjacency[v]
+                while (position[v] < len(edges)
+                       and used[edges[position[v]][1]]):
+                    position[v] += 1
+                if position[v] == len(edges):
+                    circuit.append((v, arrived))
+                    stack.pop()
+                else:
+                    u, eid = edges[position[v]]
+                    used[eid] = True
+                    stack.append((u, eid))
+            circuit.reverse()
+            if len(circuit) >= 2:
+                trails += _cut_circuit(circuit, m)
+
+        return trails
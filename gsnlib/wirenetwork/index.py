@@ -0,0 +1,185 @@
+import heapq
+import math
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from gsnlib.vector import Vector
+
+Cell = Tuple[int, int]
+
+
+class VertexGrid:
+    """Uniform grid over vertex positions.
+
+    With cells as wide as the snapping tolerance, every vertex closer than
+    the tolerance to a point lies in the 3x3 block of cells around it.
+    """
+
+    def __init__(self, cell_size: float):
+        self.cell_size = cell_size if cell_size > 0 else 1.0
+        self._cells: Dict[Cell, List[int]] = {}
+
+    def __len__(self):
+        return sum(len(c) for c in self._cells.values())
+
+    def cell(self, x: float, y: float) -> Cell:
+        return (math.floor(x / self.cell_size),
+                math.floor(y / self.cell_size))
+
+    def clear(self):
+        self._cells = {}
+
+    def insert(self, index: int, x: float, y: float):
+        key = self.cell(x, y)
+        bucket = self._cells.get(key)
+        if bucket is None:
+            self._cells[key] = [index, ]
+        else:
+            bucket.append(index)
+
+    def build(self, points: Iterable[Sequence[float]]):
+        self.clear()
+        for i, (x, y) in enumerate(points):
+            self.insert(i, x, y)
+
+    def nearby(self, x: float, y: float) -> Iterator[int]:
+        cx, cy = self.cell(x, y)
+        cells = self._cells
+        for i in (cx - 1, cx, cx + 1):
+            for j in (cy - 1, cy, cy + 1):
+                bucket = cells.get((i, j))
+                if bucket is not None:
+                    yield from bucket
+
+
+EdgeKey = Tuple[int, int]
+BBox = Tuple[float, float, float, float]
+
+
+class EdgeIndex:
+    """Hierarchical grid over edge bounding boxes.
+
+    Cells double in size from one level to the next, and every edge is
+    filed on the first level whose cells are at least as large as its
+    bounding box, so it touches at most 2x2 cells there. Queries visit the
+    overlapping cells on each populated level and return the candidates in
+    insertion order.
+    """
+
+    def __init__(self, cell_size: float):
+        self.cell_size = cell_size if cell_size > 0 else 1.0
+        self.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key: EdgeKey):
+        return key in self._entries
+
+    def clear(self):
+        self._levels: Dict[int, Dict[Cell, Dict[EdgeKey, None]]] = {}
+        self._entries: Dict[EdgeKey, Tuple[int, BBox, int]] = {}
+        self._serial = 0
+
+    def _level(self, bbox: BBox) -> int:
+        extent = max(bbox[2] - bbox[0], bbox[3] - bbox[1])
+        if extent <= self.cell_size:
+            return 0
+        return math.ceil(math.log2(extent / self.cell_size))
+
+    def _cells(self, bbox: BBox, level: int) -> Iterator[Cell]:
+        size = self.cell_size * 2 ** level
+        x0, y0 = math.floor(bbox[0] / size), math.floor(bbox[1] / size)
+        x1, y1 = math.floor(bbox[2] / size), math.floor(bbox[3] / size)
+        for i in range(x0, x1 + 1):
+            for j in range(y0, y1 + 1):
+                yield (i, j)
+
+    def insert(self, key: EdgeKey, a: Vector, b: Vector):
+        self._insert(key, (min(a.x, b.x), min(a.y, b.y),
+                           max(a.x, b.x), max(a.y, b.y)))
+
+    def _insert(self, key: EdgeKey, bbox: BBox):
+        if key in self._entries:
+            self.remove(key)
+
+        level = self._level(bbox)
+        cells = self._levels.setdefault(level, {})
+        for cell in self._cells(bbox, level):
+            cells.setdefault(cell, {})[key] = None
+
+        self._entries[key] = (self._serial, bbox, level)
+        self._serial += 1
+
+    def remove(self, key: EdgeKey):
+        _, bbox, level = self._entries.pop(key)
+        cells = self._levels[level]
+        for cell in self._cells(bbox, level):
+            bucket = cells[cell]
+            del bucket[key]
+            if not bucket:
+                del cells[cell]
+
+    def query(self, a: Vector, b: Vector,
+              margin: float = 0.0) -> List[EdgeKey]:
+        """Keys of edges whose bounding box overlaps that of a-b, grown by
+        margin."""
+        bbox = (min(a.x, b.x) - margin, min(a.y, b.y) - margin,
+                max(a.x, b.x) + margin, max(a.y, b.y) + margin)
+
+        found: Dict[EdgeKey, None] = {}
+        for level, cells in self._levels.items():
+            size = self.cell_size * 2 ** level
+            x0, y0 = math.floor(bbox[0] / size), math.floor(bbox[1] / size)
+            x1, y1 = math.floor(bbox[2] / size), math.floor(bbox[3] / size)
+
+            if (x1 - x0 + 1) * (y1 - y0 + 1) > len(cells):
+                # Cheaper to walk the occupied cells than the query range
+                for (i, j), bucket in cells.items():
+                    if x0 <= i <= x1 and y0 <= j <= y1:
+                        found.update(bucket)
+            else:
+                for cell in self._cells(bbox, level):
+                    bucket = cells.get(cell)
+                    if bucket is not None:
+                        found.update(bucket)
+
+        entries = [(self._entries[key], key) for key in found]
+        entries = [(e[0], key) for e, key in entries
+                   if e[1][0] <= bbox[2] and bbox[0] <= e[1][2]
+                   and e[1][1] <= bbox[3] and bbox[1] <= e[1][3]]
+        entries.sort()
+        return [key for _, key in entries]
+
+    def build(self, items: Iterable[Tuple[EdgeKey,
+                                          Sequence[float],
+                                          Sequence[float]]]):
+        self.clear()
+        for key, (ax, ay), (bx, by) in items:
+            self._insert(key, (min(ax, bx), min(ay, by),
+                               max(ax, bx), max(ay, by)))
+
+
+def sweep_pairs(boxes: List[BBox], margin: float = 0.0
+                ) -> Iterator[Tuple[int, int]]:
+    """Pairs of indices (i < j) whose bounding boxes overlap.
+
+    Sweeps over x with the boxes sorted by their left edge, keeping the
+    boxes still open in a heap ordered by their right edge, so only boxes
+    that share an x-range are ever compared.
+    """
+    order = sorted(range(len(boxes)), key=lambda i: boxes[i][0])
+    active: Dict[int, None] = {}
+    closing: List[Tuple[float, int]] = []
+
+    for i in order:
+        x0, y0, x1, y1 = boxes[i]
+        while closing and closing[0][0] < x0 - margin:
+            del active[heapq.heappop(closing)[1]]
+
+        for j in active:
+            other = boxes[j]
+            if other[1] <= y1 + margin and y0 <= other[3] + margin:
+                yield (i, j) if i < j else (j, i)
+
+        active[i] = None
+        heapq.heappush(closing, (x1, i))
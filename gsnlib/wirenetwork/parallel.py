@@ -0,0 +1,263 @@
+"""Build a wire network tile by tile in worker processes.
+
+The segments are clipped to a grid of tiles, each tile is built as its
+own network, and the tiles are stitched back together: vertices closer
+than the tolerance across a seam are merged, and the vertices clipping
+put on a seam are dissolved again where a single segment passes through.
+"""
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from . import WireNetwork
+from .index import VertexGrid
+from .storage import EdgeKey
+
+
+def clip_segments(segments: np.ndarray,
+                  box: Tuple[float, float, float, float]) -> np.ndarray:
+    """Liang-Barsky clip of N x 4 segments to the closed box
+    (xmin, ymin, xmax, ymax), leaving out those that miss it."""
+    x1, y1, x2, y2 = segments.T
+    dx, dy = x2 - x1, y2 - y1
+    xmin, ymin, xmax, ymax = box
+
+    t0 = np.zeros(len(segments))
+    t1 = np.ones(len(segments))
+    keep = np.ones(len(segments), dtype=bool)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for p, q in ((-dx, x1 - xmin), (dx, xmax - x1),
+                     (-dy, y1 - ymin), (dy, ymax - y1)):
+            t = q / p
+            t0 = np.where(p < 0, np.maximum(t0, t), t0)
+            t1 = np.where(p > 0, np.minimum(t1, t), t1)
+            keep &= (p != 0) | (q >= 0)
+    keep &= t0 <= t1
+
+    # Unclipped ends are kept exactly, x1 + 1 * dx need not be x2
+    clipped = np.stack((np.where(t0 > 0, x1 + t0 * dx, x1),
+                        np.where(t0 > 0, y1 + t0 * dy, y1),
+                        np.where(t1 < 1, x1 + t1 * dx, x2),
+                        np.where(t1 < 1, y1 + t1 * dy, y2)), axis=1)
+    return clipped[keep]
+
+
+def _build_tile(args: Tuple[np.ndarray, float]
+                ) -> Tuple[np.ndarray, np.ndarray]:
+    segments, tolerance = args
+    network = WireNetwork(tolerance=tolerance, compact=True)
+    network.add_segments(segments)
+    vertices, edges = network.to_numpy()
+    return vertices.copy(), edges.copy()
+
+
+def _seam_vertices(vertices: np.ndarray,
+                   edges: np.ndarray,
+                   seams: Tuple[np.ndarray, np.ndarray],
+                   ends: np.ndarray,
+                   tolerance: float) -> np.ndarray:
+    # Vertices on a seam that only join two collinear pieces of a segment
+    degrees = np.bincount(edges.ravel(), minlength=len(vertices))
+    xs, ys = seams
+    x, y = vertices.T
+    on_seam = np.zeros(len(vertices), dtype=bool)
+    for seam in xs.tolist():
+        on_seam |= np.abs(x - seam) < tolerance
+    for seam in ys.tolist():
+        on_seam |= np.abs(y - seam) < tolerance
+    candidates = np.flatnonzero(on_seam & (degrees == 2))
+
+    endpoints = VertexGrid(tolerance)
+    endpoints.build(ends.tolist())
+    neighbours: Dict[int, List[int]] = {v: [] for v in candidates.tolist()}
+    for a, b in edges.tolist():
+        if a in neighbours:
+            neighbours[a].append(b)
+        if b in neighbours:
+            neighbours[b].append(a)
+
+    coords = vertices.tolist()
+    dissolve = np.zeros(len(vertices), dtype=bool)
+    for v, (a, b) in neighbours.items():
+        x, y = coords[v]
+        if any(math.hypot(ends[i, 0] - x, ends[i, 1] - y) < tolerance
+               for i in endpoints.nearby(x, y)):
+            continue
+        (ax, ay), (bx, by) = coords[a], coords[b]
+        length = math.hypot(bx - ax, by - ay)
+        cross = (bx - ax) * (y - ay) - (by - ay) * (x - ax)
+        dot = (ax - x) * (bx - x) + (ay - y) * (by - y)
+        dissolve[v] = abs(cross) <= tolerance * length and dot < 0
+    return dissolve
+
+
+def _split_seam_edges(vertices: np.ndarray,
+                      edges: np.ndarray,
+                      seams: Tuple[np.ndarray, np.ndarray],
+                      tolerance: float) -> np.ndarray:
+    # A segment along a seam is built by the tiles on both sides, and each
+    # only splits it where its own segments meet it. Split the edges along
+    # a seam at every vertex on them, so that both copies agree.
+    split = np.zeros(len(edges), dtype=bool)
+    pieces: List[Tuple[int, int]] = []
+    for axis, lines in enumerate(seams):
+        across, along = vertices[:, axis], vertices[:, 1 - axis]
+        runs = (np.abs(along[edges[:, 0]] - along[edges[:, 1]])
+                > np.abs(across[edges[:, 0]] - across[edges[:, 1]]))
+        for line in lines.tolist():
+            near = np.abs(across - line) < tolerance
+            on = np.flatnonzero(near[edges].all(axis=1) & runs & ~split)
+            if len(on) == 0:
+                continue
+            ids = np.flatnonzero(near)
+            ids = ids[np.argsort(along[ids], kind='stable')]
+            positions = along[ids]
+            for e in on.tolist():
+                a, b = edges[e].tolist()
+                if along[b] < along[a]:
+                    a, b = b, a
+                inside = ids[np.searchsorted(positions, along[a], 'right'):
+                             np.searchsorted(positions, along[b], 'left')]
+                chain = [a] + [v for v in inside.tolist()
+                               if v != a and v != b] + [b]
+                if len(chain) > 2:
+                    split[e] = True
+                    pieces += zip(chain[:-1], chain[1:])
+
+    return np.concatenate((edges[~split],
+                           np.array(pieces, dtype=edges.dtype).reshape(-1, 2)))
+
+
+def _merge(tiles: List[Tuple[np.ndarray, np.ndarray]],
+           boxes: List[Tuple[float, float, float, float]],
+           seams: Tuple[np.ndarray, np.ndarray],
+           tolerance: float) -> Tuple[np.ndarray, np.ndarray]:
+    # Snap vertices across seams as add_vertex does. Only those closer
+    # than the tolerance to the border of their tile can meet another.
+    grid = VertexGrid(tolerance)
+    border: Dict[int, Tuple[float, float]] = {}
+    vertices: List[np.ndarray] = []
+    edges: List[np.ndarray] = []
+    count = 0
+    for (tile_vertices, tile_edges), box in zip(tiles, boxes):
+        xmin, ymin, xmax, ymax = box
+        x, y = tile_vertices.T
+        near = ((x - xmin < tolerance) | (xmax - x < tolerance)
+                | (y - ymin < tolerance) | (ymax - y < tolerance))
+
+        index = np.empty(len(tile_vertices), dtype=np.int64)
+        interior = np.flatnonzero(~near)
+        index[interior] = count + np.arange(len(interior))
+        vertices.append(tile_vertices[interior])
+        count += len(interior)
+
+        for k in np.flatnonzero(near).tolist():
+            px, py = tile_vertices[k].tolist()
+            found = None
+            for i in grid.nearby(px, py):
+                if found is not None and i > found:
+                    continue
+                qx, qy = border[i]
+                if math.hypot(qx - px, qy - py) < tolerance:
+                    found = i
+            if found is None:
+                found = count
+                count += 1
+                border[found] = (px, py)
+                grid.insert(found, px, py)
+                vertices.append(tile_vertices[k:k + 1])
+            index[k] = found
+
+        edges.append(index[tile_edges.reshape(-1, 2)])
+
+    merged = np.concatenate(vertices)
+    merged_edges = np.concatenate(edges)
+    merged_edges = merged_edges[merged_edges[:, 0] != merged_edges[:, 1]]
+    merged_edges = _split_seam_edges(merged, merged_edges, seams, tolerance)
+
+    # Edges along a seam are built by the tiles on both sides
+    _, first = np.unique(np.sort(merged_edges, axis=1), axis=0,
+                         return_index=True)
+    return merged, merged_edges[np.sort(first)]
+
+
+def _dissolve(edges: np.ndarray, dissolve: np.ndarray) -> np.ndarray:
+    # Join the pieces on either side of dissolved vertices
+    neighbours: Dict[int, List[int]] = {}
+    for a, b in edges[dissolve[edges].any(axis=1)].tolist():
+        neighbours.setdefault(a, []).append(b)
+        neighbours.setdefault(b, []).append(a)
+    joined: Dict[EdgeKey, Tuple[int, int]] = {}
+    for start, ends in neighbours.items():
+        if dissolve[start]:
+            continue
+        for v in ends:
+            previous = start
+            while dissolve[v]:
+                u, w = neighbours[v]
+                previous, v = v, (w if u == previous else u)
+            if v != start:
+                joined.setdefault((start, v) if start < v else (v, start),
+                                  (start, v))
+
+    return np.concatenate((
+        edges[~dissolve[edges].any(axis=1)],
+        np.array(list(joined.values()), dtype=np.int64).reshape(-1, 2)))
+
+
+def build_parallel(segments: Union[np.ndarray, Iterable[Sequence[float]]],
+                   tolerance: float = 0.1,
+                   tiles: Optional[int] = None,
+                   workers: Optional[int] = None,
+                   compact: bool = True) -> WireNetwork:
+    """Build a network of N x 4 segments on a tiles x tiles grid.
+
+    The tiles are built by workers processes, or in this process with
+    workers=1. The result has the vertices and edges of a network built
+    with add_segments, up to vertices within the tolerance of each other,
+    as long as features are further apart than the tolerance.
+    """
+    data = np.asarray(segments, dtype=float).reshape(-1, 4)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if tiles is None:
+        tiles = math.ceil(math.sqrt(2 * workers))
+    if len(data) == 0:
+        return WireNetwork(tolerance=tolerance, compact=compact)
+
+    points = data.reshape(-1, 2)
+    lo, hi = points.min(axis=0), points.max(axis=0)
+    xs = np.linspace(lo[0], hi[0], tiles + 1)
+    ys = np.linspace(lo[1], hi[1], tiles + 1)
+
+    jobs = []
+    boxes = []
+    for i in range(tiles):
+        for j in range(tiles):
+            box = (xs[i], ys[j], xs[i + 1], ys[j + 1])
+            clipped = clip_segments(data, box)
+            if len(clipped):
+                jobs.append((clipped, tolerance))
+                boxes.append(box)
+
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_build_tile, jobs))
+    else:
+        results = [_build_tile(job) for job in jobs]
+
+    seams = (xs[1:-1], ys[1:-1])
+    vertices, edges = _merge(results, boxes, seams, tolerance)
+    dissolve = _seam_vertices(vertices, edges, seams, points, tolerance)
+
+    edges = _dissolve(edges, dissolve)
+    kept = np.flatnonzero(~dissolve)
+    renumber = np.full(len(vertices), -1, dtype=np.int64)
+    renumber[kept] = np.arange(len(kept))
+
+    return WireNetwork.from_numpy(vertices[kept],
+                                  renumber[edges].astype(np.int32),
+                                  tolerance, compact)
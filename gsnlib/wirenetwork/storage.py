@@ -0,0 +1,164 @@
+from dataclasses import dataclass
+from typing import Dict, Iterator, MutableMapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from gsnlib.vector import Vector
+
+EdgeKey = Tuple[int, int]
+
+
+@dataclass
+class Edge:
+    a: int
+    b: int
+
+
+def _grow(data: np.ndarray, size: int) -> np.ndarray:
+    if size <= len(data):
+        return data
+    grown = np.empty((max(size, 2 * len(data), 16), ) + data.shape[1:],
+                     dtype=data.dtype)
+    grown[:len(data)] = data
+    return grown
+
+
+class VertexArray(Sequence[Vector]):
+    """Vertices as rows of a growable float64 (N, 2) array.
+
+    Indexing returns a new Vector, so changing it does not write back.
+    """
+
+    def __init__(self, data: Optional[np.ndarray] = None):
+        if data is None:
+            data = np.empty((0, 2), dtype=np.float64)
+        self._data = data
+        self._size = len(data)
+
+    @classmethod
+    def from_array(cls, data: np.ndarray) -> 'VertexArray':
+        return cls(np.array(data, dtype=np.float64).reshape(-1, 2))
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, i):  # type: ignore
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError(i)
+        x, y = self._data[i].tolist()
+        return Vector(x, y)
+
+    def __iter__(self) -> Iterator[Vector]:
+        for x, y in self.data.tolist():
+            yield Vector(x, y)
+
+    def append(self, v: Vector):
+        self._data = _grow(self._data, self._size + 1)
+        self._data[self._size] = (v.x, v.y)
+        self._size += 1
+
+    @property
+    def data(self) -> np.ndarray:
+        return self._data[:self._size]
+
+
+class EdgeArray(MutableMapping[EdgeKey, Edge]):
+    """Edges as rows of a growable int32 (M, 2) array.
+
+    Works like the dict of edges WireNetwork keeps by default. Rows stay
+    in insertion order, removed rows are blanked and squeezed out once
+    they outnumber the live ones, or when the array is exported.
+    """
+
+    _rows_: Optional[Dict[int, int]]
+
+    def __init__(self, data: Optional[np.ndarray] = None):
+        self._data = np.empty((0, 2), dtype=np.int32)
+        self._size = 0
+        # Packed (a, b) key -> row, cheaper than a dict of tuples
+        self._rows_ = {}
+        if data is not None:
+            for a, b in np.asarray(data).reshape(-1, 2).tolist():
+                self[(a, b) if a < b else (b, a)] = Edge(a, b)
+
+    @classmethod
+    def wrap(cls, data: np.ndarray) -> 'EdgeArray':
+        """Use an (M, 2) array of edges as storage without copying it.
+
+        The key lookup is only built once something needs it.
+        """
+        edges = cls()
+        edges._data = data
+        edges._size = len(data)
+        edges._rows_ = None
+        return edges
+
+    @property
+    def _rows(self) -> Dict[int, int]:
+        if self._rows_ is None:
+            rows: Dict[int, int] = {}
+            for row, (a, b) in enumerate(self._data.tolist()):
+                packed = self._pack((a, b) if a < b else (b, a))
+                if packed in rows:
+                    self._data[row] = -1
+                else:
+                    rows[packed] = row
+            self._rows_ = rows
+        return self._rows_
+
+    @staticmethod
+    def _pack(key: EdgeKey) -> int:
+        return key[0] << 32 | key[1]
+
+    @staticmethod
+    def _unpack(packed: int) -> EdgeKey:
+        return (packed >> 32, packed & 0xffffffff)
+
+    def __len__(self):
+        if self._rows_ is None:
+            return self._size
+        return len(self._rows)
+
+    def __contains__(self, key: object):
+        return (isinstance(key, tuple)
+                and self._pack(key) in self._rows)  # type: ignore
+
+    def __getitem__(self, key: EdgeKey) -> Edge:
+        a, b = self._data[self._rows[self._pack(key)]].tolist()
+        return Edge(a, b)
+
+    def __setitem__(self, key: EdgeKey, edge: Edge):
+        packed = self._pack(key)
+        row = self._rows.get(packed)
+        if row is None:
+            self._data = _grow(self._data, self._size + 1)
+            row = self._size
+            self._size += 1
+            self._rows[packed] = row
+        self._data[row] = (edge.a, edge.b)
+
+    def __delitem__(self, key: EdgeKey):
+        row = self._rows.pop(self._pack(key))
+        self._data[row] = -1
+        if self._size > 16 and self._size > 2 * len(self._rows):
+            self.compact()
+
+    def __iter__(self) -> Iterator[EdgeKey]:
+        for packed in self._rows:
+            yield self._unpack(packed)
+
+    def compact(self):
+        if self._size == len(self._rows):
+            return
+        rows = list(self._rows.values())
+        self._data[:len(rows)] = self._data[rows]
+        self._size = len(rows)
+        self._rows_ = {packed: i for i, packed in enumerate(self._rows)}
+
+    @property
+    def data(self) -> np.ndarray:
+        if self._rows_ is not None:
+            self.compact()
+        return self._data[:self._size]
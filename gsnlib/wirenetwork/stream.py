@@ -0,0 +1,114 @@
+import itertools
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence
+
+from . import WireNetwork
+from .binary import PathType, read_header
+
+logger = logging.getLogger(__file__)
+
+
+@dataclass
+class Progress:
+    segments: int
+    elapsed: float
+    rate: float
+
+
+def read_segments(path: PathType) -> Iterator[List[float]]:
+    """Segments from a text file with x1, y1, x2, y2 on each line,
+    separated by commas or whitespace. Blank lines and lines starting with
+    # are skipped."""
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            yield [float(v) for v in line.replace(',', ' ').split()]
+
+
+class StreamBuilder:
+    """Build a WireNetwork from a stream of segments, chunk by chunk.
+
+    Every checkpoint_every segments the network is written to checkpoint
+    in the binary format, together with the number of segments consumed,
+    so an interrupted build can pick up where it left off with resume.
+    """
+
+    def __init__(self,
+                 network: Optional[WireNetwork] = None,
+                 chunk_size: int = 10000,
+                 checkpoint: Optional[PathType] = None,
+                 checkpoint_every: int = 1000000,
+                 progress: Optional[Callable[[Progress], None]] = None):
+        self.network = (network if network is not None
+                        else WireNetwork(compact=True))
+        self.chunk_size = chunk_size
+        self.checkpoint_path = checkpoint
+        self.checkpoint_every = checkpoint_every
+        self.progress = progress
+        self.consumed = 0
+        # Segments of the next stream already in the network, after resume
+        self._skip = 0
+
+    @classmethod
+    def resume(cls, checkpoint: PathType, **kwargs) -> 'StreamBuilder':
+        """Continue from a checkpoint, saving new ones to the same file."""
+        header, _ = read_header(checkpoint)
+        # Read into memory, the file gets replaced by the next checkpoint
+        network = WireNetwork.load(checkpoint, mmap=False)
+        builder = cls(network=network, checkpoint=checkpoint, **kwargs)
+        builder.consumed = header['meta'].get('segments', 0)
+        builder._skip = builder.consumed
+        return builder
+
+    def save_checkpoint(self):
+        if self.checkpoint_path is None:
+            return
+        path = os.fspath(self.checkpoint_path)
+        temporary = path + '.tmp'
+        self.network.save(temporary, meta={'segments': self.consumed})
+        os.replace(temporary, path)
+
+    def consume(self,
+                segments: Iterable[Sequence[float]],
+                skip_consumed: bool = True) -> WireNetwork:
+        """Add every segment from the stream to the network.
+
+        On the first call after resume, the segments already in the
+        checkpoint are skipped from the start of the stream, unless
+        skip_consumed is False because the stream has been positioned past
+        them already. Later calls add their streams from the start.
+        """
+        stream = iter(segments)
+        if skip_consumed and self._skip > 0:
+            stream = itertools.islice(stream, self._skip, None)
+        self._skip = 0
+
+        start, started_at = time.perf_counter(), self.consumed
+        last_checkpoint = self.consumed
+        while True:
+            chunk = list(itertools.islice(stream, self.chunk_size))
+            if not chunk:
+                break
+
+            self.network.add_segments(chunk)
+            self.consumed += len(chunk)
+
+            elapsed = time.perf_counter() - start
+            rate = (self.consumed - started_at) / elapsed if elapsed else 0.0
+            logger.info("%d segments, %.0f segments/s", self.consumed, rate)
+            if self.progress is not None:
+                self.progress(Progress(self.consumed, elapsed, rate))
+
+            if self.consumed - last_checkpoint >= self.checkpoint_every:
+                self.save_checkpoint()
+                last_checkpoint = self.consumed
+
+        if self.consumed != last_checkpoint:
+            self.save_checkpoint()
+
+        return self.network
@@ -0,0 +1,212 @@
+import math
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from gsnlib.vector import Vector
+
+if TYPE_CHECKING:
+    from . import WireNetwork
+
+Cell = Tuple[int, int]
+
+
+class _EndpointGrid:
+    """Uniform grid over stroke endpoints for nearest-neighbour lookups.
+
+    Endpoint 2 * s is the start of stroke s, 2 * s + 1 its end.
+    """
+
+    def __init__(self, points: List[List[float]], ids: Sequence[int]):
+        xs = [points[i][0] for i in ids]
+        ys = [points[i][1] for i in ids]
+        # From the longer side, so collinear endpoints get usable cells
+        side = max(max(xs) - min(xs), max(ys) - min(ys))
+        self.size = side / math.sqrt(len(ids)) if side > 0 else 1.0
+        self.points = points
+        self.count = len(ids)
+        self.built = len(ids)
+
+        self.cells: Dict[Cell, List[int]] = {}
+        self.where: Dict[int, Cell] = {}
+        for i, x, y in zip(ids, xs, ys):
+            cell = (math.floor(x / self.size), math.floor(y / self.size))
+            self.cells.setdefault(cell, []).append(i)
+            self.where[i] = cell
+
+        cxs = [c[0] for c in self.cells]
+        cys = [c[1] for c in self.cells]
+        self.bounds = (min(cxs), min(cys), max(cxs), max(cys))
+
+    def remove(self, i: int):
+        cell = self.where.pop(i)
+        self.cells[cell].remove(i)
+        if not self.cells[cell]:
+            del self.cells[cell]
+        self.count -= 1
+
+    def remaining(self) -> List[int]:
+        return list(self.where)
+
+    def nearest(self, x: float, y: float) -> Optional[int]:
+        if self.count == 0:
+            return None
+
+        cx, cy = math.floor(x / self.size), math.floor(y / self.size)
+        x0, y0, x1, y1 = self.bounds
+        rings = max(abs(cx - x0), abs(cx - x1), abs(cy - y0), abs(cy - y1))
+
+        best, best_d = None, math.inf
+        for r in range(rings + 1):
+            # Nothing beyond this ring can be closer than r - 1 cells
+            if best is not None and best_d <= ((r - 1) * self.size) ** 2:
+                return best
+            # Once the rings cover more cells than are occupied, scanning
+            # those is cheaper than walking on through empty ones
+            if (2 * r + 1) ** 2 > len(self.cells):
+                return self._scan(x, y)
+            for cell in self._ring(cx, cy, r):
+                for i in self.cells.get(cell, ()):
+                    px, py = self.points[i]
+                    d = (px - x) ** 2 + (py - y) ** 2
+                    if d < best_d:
+                        best, best_d = i, d
+        return best
+
+    def _scan(self, x: float, y: float) -> Optional[int]:
+        best, best_d = None, math.inf
+        for members in self.cells.values():
+            for i in members:
+                px, py = self.points[i]
+                d = (px - x) ** 2 + (py - y) ** 2
+                if d < best_d:
+                    best, best_d = i, d
+        return best
+
+    @staticmethod
+    def _ring(cx: int, cy: int, r: int):
+        if r == 0:
+            yield (cx, cy)
+            return
+        for i in range(cx - r, cx + r + 1):
+            yield (i, cy - r)
+            yield (i, cy + r)
+        for j in range(cy - r + 1, cy + r):
+            yield (cx - r, j)
+            yield (cx + r, j)
+
+
+def _nearest_neighbour(heads: np.ndarray,
+                       tails: np.ndarray,
+                       start: Tuple[float, float]
+                       ) -> Tuple[List[int], List[bool]]:
+    ends = np.empty((2 * len(heads), 2))
+    ends[0::2] = heads
+    ends[1::2] = tails
+    points = ends.tolist()
+    grid = _EndpointGrid(points, range(len(points)))
+
+    order: List[int] = []
+    flipped: List[bool] = []
+    x, y = start
+    while True:
+        i = grid.nearest(x, y)
+        if i is None:
+            break
+        s = i // 2
+        grid.remove(2 * s)
+        grid.remove(2 * s + 1)
+        order.append(s)
+        flipped.append(i % 2 == 1)
+        x, y = points[(2 * s) if i % 2 == 1 else (2 * s + 1)]
+
+        # Coarsen the grid as it empties, so lookups stay local
+        if 0 < grid.count < grid.built // 4:
+            ids = grid.remaining()
+            grid = _EndpointGrid(points, ids)
+
+    return order, flipped
+
+
+def _two_opt(heads: np.ndarray,
+             tails: np.ndarray,
+             order: List[int],
+             flipped: List[bool],
+             start: Tuple[float, float],
+             window: int,
+             passes: int) -> Tuple[List[int], List[bool]]:
+    # Pen down and pen up position of every stroke in drawing order
+    starts, ends = heads.tolist(), tails.tolist()
+    first = [ends[s] if f else starts[s] for s, f in zip(order, flipped)]
+    last = [starts[s] if f else ends[s] for s, f in zip(order, flipped)]
+
+    hypot = math.hypot
+    n = len(order)
+    for _ in range(passes):
+        improved = False
+        for i in range(n):
+            bx, by = last[i - 1] if i > 0 else start
+            fx, fy = first[i]
+            current = hypot(bx - fx, by - fy)
+            for j in range(i, min(i + window, n)):
+                # Reverse strokes i..j, drawing each the other way
+                lx, ly = last[j]
+                removed = current
+                added = hypot(bx - lx, by - ly)
+                if j + 1 < n:
+                    nx, ny = first[j + 1]
+                    removed += hypot(lx - nx, ly - ny)
+                    added += hypot(fx - nx, fy - ny)
+                if added < removed - 1e-12:
+                    order[i:j + 1] = order[i:j + 1][::-1]
+                    flipped[i:j + 1] = [not f for f in flipped[i:j + 1][::-1]]
+                    first[i:j + 1], last[i:j + 1] = (last[i:j + 1][::-1],
+                                                     first[i:j + 1][::-1])
+                    fx, fy = first[i]
+                    current = hypot(bx - fx, by - fy)
+                    improved = True
+        if not improved:
+            break
+
+    return order, flipped
+
+
+def pen_travel(strokes: List[List[Vector]],
+               start: Tuple[float, float] = (0.0, 0.0)) -> float:
+    """Distance travelled with the pen up to draw strokes in order."""
+    x, y = start
+    total = 0.0
+    for stroke in strokes:
+        total += math.hypot(stroke[0].x - x, stroke[0].y - y)
+        x, y = stroke[-1].x, stroke[-1].y
+    return total
+
+
+def plot_order(network: 'WireNetwork',
+               start: Tuple[float, float] = (0.0, 0.0),
+               window: int = 16,
+               passes: int = 2) -> List[List[Vector]]:
+    """Polylines covering every edge once, ordered for a pen plotter.
+
+    Edges are chained into as few polylines as possible, then ordered
+    greedily by the nearest free endpoint from the pen, and improved by
+    2-opt moves that reverse runs of up to window strokes.
+    """
+    graph = network.graph()
+    trails = graph.eulerian_trails()
+    if not trails:
+        return []
+
+    coords = graph.vertices
+    heads = coords[[t[0] for t in trails]]
+    tails = coords[[t[-1] for t in trails]]
+
+    order, flipped = _nearest_neighbour(heads, tails, start)
+    order, flipped = _two_opt(heads, tails, order, flipped,
+                              start, window, passes)
+
+    strokes: List[List[Vector]] = []
+    for s, f in zip(order, flipped):
+        trail = trails[s][::-1] if f else trails[s]
+        strokes.append([Vector(x, y) for x, y in coords[trail].tolist()])
+    return strokes
@@ -1,8 +1,11 @@
 import unittest
 import math
+import numpy as np
 
 from gsnlib.constants import EPSILON
-from gsnlib.coordinates import Coordinates
+from gsnlib.coordinates import Coordinates, Coordinates3D, Program
+from gsnlib.vector import Vector
+from gsnlib.vectorarray import VectorArray
 
 
 epsilon = EPSILON * 10
@@ -183,3 +186,256 @@ class TestStack(unittest.TestCase):
 
         self.assertEqual(c.pos[0], 1)
         self.assertEqual(c.pos[1], 0)
+
+    def test_depth(self):
+        c = Coordinates()
+        for i in range(40):
+            c.translate(1, 0)
+            c.push()
+        self.assertEqual((c.depth, c.peak_depth), (40, 40))
+        self.assertEqual(len(c.stack), 40)
+        self.assertEqual(c.stack[-1][0, 2], 40)
+
+        for i in range(40, 0, -1):
+            c.translate(100, 0)
+            c.pop()
+            self.assertEqual(c.position, (i, 0))
+        self.assertEqual((c.depth, c.peak_depth), (0, 40))
+
+        with self.assertRaises(IndexError):
+            c.pop()
+
+        c.reset()
+        self.assertEqual((c.depth, c.peak_depth), (0, 0))
+
+
+class TestMatrix(unittest.TestCase):
+    def test_matches_product(self):
+        c = Coordinates()
+        c.translate(3, -2)
+        c.rotate(0.7)
+        c.scale(1.5)
+        c.translate(1, 4)
+
+        m = np.identity(3)
+        for t in (np.array([[1, 0, 3], [0, 1, -2], [0, 0, 1]]),
+                  np.array([[math.cos(0.7), -math.sin(0.7), 0],
+                            [math.sin(0.7), math.cos(0.7), 0],
+                            [0, 0, 1]]),
+                  np.diag([1.5, 1.5, 1]),
+                  np.array([[1, 0, 1], [0, 1, 4], [0, 0, 1]])):
+            m = m.dot(t)
+        np.testing.assert_allclose(c.matrix, m, atol=1e-12)
+
+    def test_set_matrix(self):
+        c = Coordinates()
+        c.matrix = np.array([[0, -1, 5], [1, 0, 6], [0, 0, 1]])
+        c.translate(1, 0)
+        self.assertEqual(c.position, (5, 7))
+        c.push()
+        c.matrix = np.identity(3)
+        c.pop()
+        self.assertEqual(c.matrix.tolist(),
+                         [[0, -1, 5], [1, 0, 7], [0, 0, 1]])
+
+    def test_position(self):
+        c = Coordinates()
+        c.translate(1 / 3, 2 / 3)
+        self.assertEqual(c.position, (1 / 3, 2 / 3))
+        self.assertEqual(c.x, 0.333)
+        self.assertEqual(c.pos.tolist(), [0.333, 0.667])
+
+
+class TestApply(unittest.TestCase):
+    def setUp(self):
+        self.c = Coordinates()
+        self.c.translate(3, -2)
+        self.c.rotate(0.7)
+        self.c.scale(1.5)
+
+    def test_apply(self):
+        points = np.array([[0, 0], [1, 0], [2.5, -4]])
+        expected = []
+        for x, y in points.tolist():
+            self.c.push()
+            self.c.translate(x, y)
+            expected.append(self.c.position)
+            self.c.pop()
+        np.testing.assert_allclose(self.c.apply(points), expected)
+        np.testing.assert_allclose(
+            self.c.apply([Vector(x, y) for x, y in points.tolist()]),
+            expected)
+        np.testing.assert_allclose(
+            self.c.apply(VectorArray(points)), expected)
+
+    def test_apply_inverse(self):
+        points = np.random.default_rng(0).uniform(-10, 10, (20, 2))
+        np.testing.assert_allclose(
+            self.c.apply_inverse(self.c.apply(points)), points)
+
+        self.c.scale(0)
+        with self.assertRaises(ValueError):
+            self.c.apply_inverse(points)
+
+    def test_empty(self):
+        self.assertEqual(self.c.apply([]).shape, (0, 2))
+
+    def test_wrong_shape(self):
+        points = np.arange(6.0).reshape(2, 3)
+        with self.assertRaises(ValueError):
+            self.c.apply(points)
+        with self.assertRaises(ValueError):
+            self.c.apply_inverse(points)
+        with self.assertRaises(ValueError):
+            self.c.apply(np.arange(4.0))
+
+
+class TestProgram(unittest.TestCase):
+    def program(self):
+        p = Program()
+        p.translate('step', 0).mark()
+        p.push().rotate('angle').translate('step', 1).mark().pop()
+        p.scale(2).rotate(math.pi / 2).translate(1, 'step').mark()
+        return p
+
+    def test_replay(self):
+        steps = [1.0, 2.5, -3.0]
+        angles = [0.0, 0.3, -2.0]
+        positions = self.program().replay({'step': steps, 'angle': angles})
+        self.assertEqual(positions.shape, (3, 3, 2))
+
+        for i, (step, angle) in enumerate(zip(steps, angles)):
+            c = Coordinates()
+            expected = []
+            c.translate(step, 0)
+            expected.append(c.position)
+            c.push()
+            c.rotate(angle)
+            c.translate(step, 1)
+            expected.append(c.position)
+            c.pop()
+            c.scale(2)
+            c.rotate(math.pi / 2)
+            c.translate(1, step)
+            expected.append(c.position)
+            np.testing.assert_allclose(positions[i], expected, atol=1e-12)
+
+    def test_batch(self):
+        p = Program().translate(1, 2).mark().mark()
+        self.assertEqual(p.marks, 2)
+        self.assertEqual(p.replay().tolist(), [[[1, 2], [1, 2]]])
+        self.assertEqual(p.replay(batch=4).shape, (4, 2, 2))
+        self.assertEqual(Program().replay(batch=3).shape, (3, 0, 2))
+
+        with self.assertRaises(KeyError):
+            self.program().replay({'step': [1, 2]})
+
+
+class TestCoordinates3D(unittest.TestCase):
+    @staticmethod
+    def rotation(i, j, v):
+        m = np.identity(4)
+        m[i, i] = m[j, j] = math.cos(v)
+        m[j, i] = math.sin(v)
+        m[i, j] = -math.sin(v)
+        return m
+
+    def test_matches_product(self):
+        c = Coordinates3D()
+        c.translate(1, 2, 3)
+        c.yaw(0.3)
+        c.pitch(-1.1)
+        c.roll(2.0)
+        c.scale(1, 2, 0.5)
+        c.translate(4, -1, 2)
+
+        m = np.identity(4)
+        for t in (np.array([[1, 0, 0, 1], [0, 1, 0, 2],
+                            [0, 0, 1, 3], [0, 0, 0, 1]]),
+                  self.rotation(0, 1, 0.3),
+                  self.rotation(2, 0, -1.1),
+                  self.rotation(1, 2, 2.0),
+                  np.diag([1, 2, 0.5, 1]),
+                  np.array([[1, 0, 0, 4], [0, 1, 0, -1],
+                            [0, 0, 1, 2], [0, 0, 0, 1]])):
+            m = m.dot(t)
+        np.testing.assert_allclose(c.matrix, m, atol=1e-12)
+
+    def test_turtle(self):
+        c = Coordinates3D()
+        c.yaw(math.pi / 2)
+        c.translate(1, 0)
+        self.assertEqual((c.x, c.y, c.z), (0, 1, 0))
+
+        c.reset()
+        c.pitch(-math.pi / 2)
+        c.translate(1, 0)
+        self.assertEqual(c.pos.tolist(), [0, 0, 1])
+
+        c.roll(math.pi / 2)
+        c.translate(0, 1)
+        np.testing.assert_allclose(c.position, (-1, 0, 1), atol=1e-12)
+
+    def test_matches_2d(self):
+        c, d = Coordinates(), Coordinates3D()
+        for v in (0.3, -1.2, 2.0):
+            c.rotate(v)
+            d.rotate(v)
+            c.translate(2, 1)
+            d.translate(2, 1)
+            c.scale(1.5)
+            d.scale(1.5)
+        self.assertEqual(c.position, d.position[:2])
+        self.assertEqual(d.position[2], 0)
+
+    def test_stack(self):
+        c = Coordinates3D()
+        c.translate(1, 2, 3)
+        c.push()
+        c.rotate_x(1)
+        c.scale(3)
+        c.pop()
+        self.assertEqual(c.position, (1, 2, 3))
+        self.assertEqual((c.depth, c.peak_depth), (0, 1))
+        with self.assertRaises(IndexError):
+            c.pop()
+
+    def test_scale(self):
+        c = Coordinates3D()
+        c.scale(2, 3, 4)
+        c.translate(1, 1, 1)
+        self.assertEqual(c.position, (2, 3, 4))
+        with self.assertRaises(ValueError):
+            c.scale(2, 3)
+
+    def test_apply(self):
+        c = Coordinates3D()
+        c.translate(1, 2, 3)
+        c.rotate_y(0.4)
+        c.scale(2, 1, 0.5)
+
+        points = np.random.default_rng(1).uniform(-5, 5, (10, 3))
+        m = c.matrix
+        expected = points.dot(m[:3, :3].T) + m[:3, 3]
+        np.testing.assert_allclose(c.apply(points), expected)
+        np.testing.assert_allclose(
+            c.apply([Vector(*p) for p in points.tolist()]), expected)
+        np.testing.assert_allclose(c.apply_inverse(expected), points)
+
+        c.scale(1, 0, 1)
+        with self.assertRaises(ValueError):
+            c.apply_inverse(points)
+
+    def test_apply_2d(self):
+        c = Coordinates3D()
+        c.translate(1, 2, 3)
+        c.rotate_x(0.4)
+
+        points = np.arange(6.0).reshape(3, 2)
+        flat = np.column_stack((points, np.zeros(3)))
+        np.testing.assert_allclose(c.apply(points), c.apply(flat))
+        np.testing.assert_allclose(
+            c.apply([Vector(*p) for p in points.tolist()]), c.apply(flat))
+        self.assertEqual(c.apply_inverse(points).shape, (3, 3))
+        with self.assertRaises(ValueError):
+            c.apply(np.arange(8.0).reshape(2, 4))
@@ -1,5 +1,6 @@
 import unittest
 
+from gsnlib.formal.lsystem import lsystem
 from gsnlib.lsystem import LSystem
 
 
@@ -27,3 +28,35 @@ class TestLSystem(unittest.TestCase):
 
         s.reset()
         self.assertEqual(s.state, 'a')
+
+    def test_expand(self):
+        s = LSystem('a[b]')
+        s.add_rule('a', 'ab')
+        s.add_rule('b', 'a[-b]')
+
+        self.assertEqual(''.join(s.expand(0)), 'a[b]')
+        for generations in range(1, 8):
+            expected = LSystem(s.state)
+            expected.rules = s.rules
+            for _ in range(generations):
+                expected.iterate()
+            self.assertEqual(''.join(s.expand(generations)), expected.state)
+        self.assertEqual(s.state, 'a[b]')
+
+    def test_expand_deep(self):
+        s = LSystem('ab')
+        s.add_rule('a', 'a')
+        self.assertEqual(''.join(s.expand(5000)), 'ab')
+
+
+class TestFormalLSystem(unittest.TestCase):
+    def test_expand(self):
+        s = lsystem()
+        s.rules = {'a': 'ab', 'b': 'a'}
+        s.axiom = 'a'
+        s.update(2)
+
+        symbols = ''.join(s.expand(3))
+        self.assertEqual(s.get_state(), 'aba')
+        s.update(3)
+        self.assertEqual(symbols, s.get_state())
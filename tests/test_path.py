@@ -1,7 +1,12 @@
+import itertools
+import math
 import unittest
 
+import numpy as np
+
 from gsnlib import path
 from gsnlib.vector import Vector
+from gsnlib.vectorarray import VectorArray
 
 
 class TestPointLineDist(unittest.TestCase):
@@ -44,3 +49,305 @@ class TestPointReduction(unittest.TestCase):
 
         reduced = path.reduce_points(points, 2)
         self.assertEqual(len(reduced), 2)
+
+    def test_reduce_points_first_furthest(self):
+        # Two points are furthest from the line, the first one is kept
+        points = [Vector(0, 0), Vector(1, 5), Vector(2, 0),
+                  Vector(3, 5), Vector(4, 0)]
+
+        reduced = path.reduce_points(points, 4)
+        self.assertEqual(reduced, [Vector(0, 0), Vector(1, 5), Vector(4, 0)])
+
+    def test_reduce_mask(self):
+        points = [Vector(0, 0), Vector(5, 0.1), Vector(10, 0),
+                  Vector(10, 10)]
+        mask = path.reduce_mask(points, 0.5)
+        self.assertEqual(mask.tolist(), [True, False, True, True])
+
+        self.assertEqual(path.reduce_mask([], 1).tolist(), [])
+
+    def test_reduce_array(self):
+        points = [Vector(0, 0), Vector(5, 0.1), Vector(10, 0),
+                  Vector(10, 10)]
+        array = np.array([[p.x, p.y] for p in points])
+
+        reduced = path.reduce_points(array, 0.5)
+        self.assertIsInstance(reduced, np.ndarray)
+        np.testing.assert_array_equal(reduced, [[0, 0], [10, 0], [10, 10]])
+
+        reduced = path.reduce_points(VectorArray(array), 0.5)
+        self.assertIsInstance(reduced, VectorArray)
+        self.assertEqual(reduced.to_vectors(), path.reduce_points(points, 0.5))
+
+    def test_reduce_long_trace(self):
+        rng = np.random.default_rng(1)
+        points = np.cumsum(rng.normal(0, 1, (200000, 2)), axis=0)
+
+        mask = path.reduce_mask(points, 3)
+        kept = np.flatnonzero(mask)
+        self.assertEqual(kept[0], 0)
+        self.assertEqual(kept[-1], len(points) - 1)
+
+        # Every dropped point lies within tolerance of its new segment
+        for a, b in zip(kept[:-1:97], kept[1::97]):
+            for i in range(a + 1, b):
+                d = path.pointlinedist(Vector(*points[i]),
+                                       Vector(*points[a]),
+                                       Vector(*points[b]))
+                self.assertLessEqual(d, 3)
+
+
+class TestReduceShapes(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        self.shapes = []
+        for _ in range(30):
+            shape = []
+            for _ in range(rng.integers(1, 4)):
+                walk = np.cumsum(rng.normal(0, 1, (rng.integers(2, 200), 2)),
+                                 axis=0)
+                shape.append([Vector(x, y) for x, y in walk.tolist()])
+            self.shapes.append(shape)
+
+    def test_serial(self):
+        reduced = path.reduce_shapes(self.shapes, 1.5)
+        self.assertEqual(reduced, [[path.reduce_points(part, 1.5)
+                                    for part in shape]
+                                   for shape in self.shapes])
+
+    def test_workers(self):
+        serial = path.reduce_shapes(self.shapes, 1.5)
+        for chunk_size in (1, 500, 100000):
+            reduced = path.reduce_shapes(self.shapes, 1.5, workers=2,
+                                         chunk_size=chunk_size)
+            self.assertEqual(reduced, serial)
+
+        # Parts come back as the objects that went in
+        self.assertIs(reduced[0][0][0], self.shapes[0][0][0])
+
+    def test_workers_arrays(self):
+        shapes = [[np.array([[p.x, p.y] for p in part]) for part in shape]
+                  for shape in self.shapes]
+        reduced = path.reduce_shapes(shapes, 1.5, workers=2)
+        for shape, expected in zip(reduced,
+                                   path.reduce_shapes(shapes, 1.5)):
+            for a, b in zip(shape, expected):
+                np.testing.assert_array_equal(a, b)
+
+
+class TestVisvalingam(unittest.TestCase):
+    @staticmethod
+    def naive(points, area):
+        # Drop the smallest effective area each round, rescanning them all
+        keep = list(range(len(points)))
+        floor = 0.0
+        while len(keep) > 2:
+            areas = []
+            for k in range(1, len(keep) - 1):
+                a, b, c = (points[keep[k - 1]], points[keep[k]],
+                           points[keep[k + 1]])
+                areas.append(max(abs((b.x - a.x) * (c.y - a.y)
+                                     - (c.x - a.x) * (b.y - a.y)) / 2,
+                                 floor))
+            k = min(range(len(areas)), key=lambda k: areas[k])
+            if areas[k] >= area:
+                break
+            floor = areas[k]
+            del keep[k + 1]
+        return [points[i] for i in keep]
+
+    def test_triangle(self):
+        points = [Vector(0, 0), Vector(1, 1), Vector(2, 0)]
+        self.assertEqual(path.reduce_visvalingam(points, 0.5), points)
+        self.assertEqual(path.reduce_visvalingam(points, 1.5),
+                         [Vector(0, 0), Vector(2, 0)])
+
+    def test_short(self):
+        self.assertEqual(path.visvalingam_mask([], 1).tolist(), [])
+        self.assertEqual(path.visvalingam_mask([Vector(0, 0), Vector(1, 1)],
+                                               1).tolist(), [True, True])
+
+    def test_matches_naive(self):
+        rng = np.random.default_rng(4)
+        for _ in range(20):
+            walk = np.cumsum(rng.normal(0, 1, (rng.integers(3, 60), 2)),
+                             axis=0)
+            points = [Vector(x, y) for x, y in walk.tolist()]
+            for area in (0.1, 1, 5):
+                self.assertEqual(path.reduce_visvalingam(points, area),
+                                 self.naive(points, area))
+
+    def test_array(self):
+        points = np.array([[0, 0], [1, 0.01], [2, 0], [2, 5]])
+        np.testing.assert_array_equal(path.reduce_visvalingam(points, 0.5),
+                                      [[0, 0], [2, 0], [2, 5]])
+
+
+class TestStreamingSimplification(unittest.TestCase):
+    def test_radial_distance(self):
+        points = [Vector(x, 0) for x in (0, 0.5, 1.2, 1.5, 2.5, 2.7)]
+        reduced = list(path.radial_distance(iter(points), 1))
+        self.assertEqual(reduced, [Vector(0, 0), Vector(1.2, 0),
+                                   Vector(2.5, 0), Vector(2.7, 0)])
+
+    def test_radial_distance_endless(self):
+        stream = (Vector(math.cos(t / 10), math.sin(t / 10))
+                  for t in itertools.count())
+        reduced = list(itertools.islice(path.radial_distance(stream, 0.5),
+                                        10))
+        self.assertEqual(len(reduced), 10)
+        for a, b in zip(reduced, reduced[1:]):
+            self.assertGreaterEqual(a.dist(b), 0.5)
+
+    def test_reumann_witkam(self):
+        points = ([Vector(x, 0.01 * (-1) ** x) for x in range(10)]
+                  + [Vector(9, y) for y in range(1, 10)])
+        reduced = list(path.reumann_witkam(iter(points), 0.5))
+        self.assertEqual(reduced, [points[0], Vector(9, -0.01),
+                                   Vector(9, 9)])
+
+    def test_reumann_witkam_short(self):
+        self.assertEqual(list(path.reumann_witkam([], 1)), [])
+        self.assertEqual(list(path.reumann_witkam([Vector(1, 1)], 1)),
+                         [Vector(1, 1)])
+        points = [Vector(0, 0), Vector(0, 0), Vector(1, 1)]
+        self.assertEqual(list(path.reumann_witkam(points, 1)),
+                         [Vector(0, 0), Vector(1, 1)])
+
+    def test_reumann_witkam_lazy(self):
+        stream = (Vector(t, 0 if t < 100 else t - 100)
+                  for t in itertools.count())
+        reduced = path.reumann_witkam(stream, 0.5)
+        self.assertEqual(next(reduced), Vector(0, 0))
+        self.assertEqual(next(reduced), Vector(100, 0))
+
+
+class TestSharedBorders(unittest.TestCase):
+    def setUp(self):
+        # Two polygons on either side of a wiggly border from (0, 0) to
+        # (0, 10), each going round its own way
+        rng = np.random.default_rng(5)
+        border = [Vector(rng.normal(0, 0.3), y) for y in range(11)]
+        border[0], border[-1] = Vector(0, 0), Vector(0, 10)
+        self.border = border
+        self.left = border + [Vector(-5, 10), Vector(-5, 0), Vector(0, 0)]
+        self.right = ([Vector(5, 5), Vector(5, 10)] + border[::-1]
+                      + [Vector(5, 0), Vector(5, 5)])
+
+    @staticmethod
+    def interior(part):
+        return [(p.x, p.y) for p in part if 0 < p.y < 10 and abs(p.x) < 1]
+
+    def test_border_shared(self):
+        left, right = (shape[0] for shape in path.reduce_shapes(
+            [[self.left], [self.right]], 0.5, topology=True))
+
+        self.assertEqual(self.interior(left), self.interior(right)[::-1])
+        self.assertEqual(left[0], left[-1])
+        self.assertEqual(right[0], right[-1])
+
+        border = path.reduce_points(self.border, 0.5)
+        self.assertEqual(self.interior(left), self.interior(border))
+
+    def test_rings_start_at_junction(self):
+        _, right = (shape[0] for shape in path.reduce_shapes(
+            [[self.left], [self.right]], 0.5, topology=True))
+        self.assertEqual(right[0], Vector(0, 10))
+        self.assertEqual(right[-1], Vector(0, 10))
+
+    def test_island(self):
+        ring = [Vector(math.cos(t / 5) * (3 + 0.1 * (-1) ** t),
+                       math.sin(t / 5) * 3) for t in range(31)]
+        ring.append(ring[0])
+        hole = ring[5:-1] + ring[:6]
+
+        island, lake = path.reduce_shapes([[ring], [hole[::-1]]], 0.2,
+                                          topology=True)
+        self.assertEqual(island[0], lake[0][::-1])
+        self.assertEqual(island[0][0], min(ring))
+
+    def test_open_parts(self):
+        line = [Vector(x, math.sin(x)) for x in range(20)]
+        reduced = path.reduce_shapes([[line]], 0.3, topology=True)
+        self.assertEqual(reduced, [[path.reduce_points(line, 0.3)]])
+
+    def test_repeated_points(self):
+        # Same ends, same first steps and length, different repeats
+        a = np.array([[0, 0], [1, 0.5], [1, 0.5], [2, 0], [3, 0]])
+        b = np.array([[0, 0], [1, 0.5], [2, 0], [2, 0], [3, 0]])
+        reduced = path.reduce_shapes([[a], [b], [a]], 0.01, topology=True)
+        self.assertEqual([shape[0].tolist() for shape in reduced],
+                         [path.reduce_points(p, 0.01).tolist()
+                          for p in (a, b, a)])
+
+    def test_workers_and_arrays(self):
+        shapes = [[np.array([[p.x, p.y] for p in self.left])],
+                  [np.array([[p.x, p.y] for p in self.right])]]
+        serial = path.reduce_shapes(shapes, 0.5, topology=True)
+        pooled = path.reduce_shapes(shapes, 0.5, topology=True, workers=2,
+                                    chunk_size=1)
+        for a, b in zip(serial, pooled):
+            np.testing.assert_array_equal(a[0], b[0])
+
+
+class TestSegmentDistances(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(6)
+        self.points = rng.uniform(-10, 10, (50, 2))
+        self.segments = rng.uniform(-10, 10, (30, 4))
+        self.segments[3, 2:] = self.segments[3, :2]
+
+    @staticmethod
+    def distance(p, s):
+        a, b = Vector(*s[:2]), Vector(*s[2:])
+        ab = b.minus(a)
+        t = 0.0
+        if ab.dot(ab) > 0:
+            t = min(1.0, max(0.0, Vector(*p).minus(a).dot(ab) / ab.dot(ab)))
+        return Vector(*p).dist(a.plus(ab.times(t)))
+
+    def test_matrix(self):
+        d = path.segment_distances(self.points, self.segments)
+        self.assertEqual(d.shape, (50, 30))
+        for i in range(0, 50, 7):
+            for j in range(30):
+                expected = self.distance(self.points[i], self.segments[j])
+                self.assertAlmostEqual(d[i, j], expected)
+
+    def test_ends(self):
+        segments = np.array([[0, 0, 10, 0]])
+        points = [Vector(5, 3), Vector(-3, 4), Vector(13, -4)]
+        np.testing.assert_allclose(path.segment_distances(points, segments),
+                                   [[3], [5], [5]])
+
+    def test_chunks(self):
+        d = path.segment_distances(self.points, self.segments)
+        np.testing.assert_array_equal(
+            path.segment_distances(self.points,
+                                   self.segments.reshape(-1, 2, 2),
+                                   chunk_size=100), d)
+
+        # Fewer pairs per block than segments splits the segments too
+        for chunk_size in (1, 7, 100):
+            np.testing.assert_array_equal(
+                path.segment_distances(self.points, self.segments,
+                                       chunk_size=chunk_size), d)
+            distance, index = path.nearest_segment(
+                self.points, self.segments, chunk_size=chunk_size)
+            np.testing.assert_array_equal(index, np.argmin(d, axis=1))
+            np.testing.assert_array_equal(distance, np.min(d, axis=1))
+
+    def test_nearest(self):
+        segments = [[0, 0, 10, 0], [0, 5, 10, 5], [0, 0, 10, 0]]
+        distance, index = path.nearest_segment([Vector(2, 1), Vector(2, 4)],
+                                               segments)
+        np.testing.assert_allclose(distance, [1, 1])
+        self.assertEqual(index.tolist(), [0, 1])
+
+        # The first of equal segments wins across blocks as well
+        _, index = path.nearest_segment([Vector(2, 1), Vector(2, 4)],
+                                        segments, chunk_size=1)
+        self.assertEqual(index.tolist(), [0, 1])
+
+        with self.assertRaises(ValueError):
+            path.nearest_segment([Vector(0, 0)], np.empty((0, 4)))
@@ -79,3 +79,61 @@ class TestVector(unittest.TestCase):
 
         self.assertEqual(v2, v1)
         self.assertIsNot(v1, v2)
+
+    def test_v(self):
+        p = Vector.from_array([1.0, 2.0])
+        self.assertEqual(p.v, [1.0, 2.0, 0.0])
+
+        p.v = [3.0, 4.0, 5.0]
+        self.assertEqual((p.x, p.y, p.z), (3.0, 4.0, 5.0))
+
+        p.x = 6.0
+        self.assertEqual(p.v, [6.0, 4.0, 5.0])
+
+    def test_slots(self):
+        p = Vector(0, 0)
+        with self.assertRaises(AttributeError):
+            p.w = 1.0
+
+    def test_cross(self):
+        self.assertEqual(Vector(1, 0).cross(Vector(0, 1)), 1)
+        self.assertEqual(Vector(2, 3).cross(Vector(4, 6)), 0)
+
+    def test_dist_sq_to(self):
+        self.assertEqual(Vector(0, 0).dist_sq_to(Vector(3, 4)), 25)
+
+    def test_in_place(self):
+        a = Vector(1, 2)
+        b = Vector(3, 5)
+
+        c = a.clone()
+        self.assertIs(c.iplus(b), c)
+        self.assertEqual(c, a.plus(b))
+        self.assertEqual(a.clone().iminus(b), a.minus(b))
+        self.assertEqual(a.clone().iscale(3), a.times(3))
+        self.assertEqual(a.clone().ilerp(b, 0.3), a.lerp(b, 0.3))
+        self.assertEqual(Vector().assign(b), b)
+
+        c = a.clone()
+        c += b
+        self.assertEqual(c, a + b)
+        c = Vector(1, 2, 3)
+        c -= Vector(1, 1, 1)
+        self.assertEqual(c, Vector(1, 2, 3) - Vector(1, 1, 1))
+        c = a.clone()
+        c *= 2
+        self.assertEqual(c, a.times(2))
+
+    def test_in_place_aliasing(self):
+        a = Vector(1, 2, 3)
+        b = a
+        a += Vector(1, 1)
+        self.assertIs(a, b)
+        self.assertEqual(b, Vector(2, 3, 3))
+
+        # The binary form binds a new vector, without z
+        a = Vector(1, 2, 3)
+        b = a
+        a = a + Vector(1, 1)
+        self.assertEqual(b, Vector(1, 2, 3))
+        self.assertEqual(a, Vector(2, 3))
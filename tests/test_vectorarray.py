@@ -0,0 +1,91 @@
+import random
+import unittest
+
+import numpy as np
+
+from gsnlib.constants import EPSILON
+from gsnlib.vector import Vector
+from gsnlib.vectorarray import VectorArray
+
+
+class TestVectorArray(unittest.TestCase):
+    def setUp(self):
+        self.a = [Vector(random.uniform(-10, 10), random.uniform(-10, 10))
+                  for _ in range(20)]
+        self.b = [Vector(random.uniform(-10, 10), random.uniform(-10, 10))
+                  for _ in range(20)]
+        self.va = VectorArray.from_vectors(self.a)
+        self.vb = VectorArray.from_vectors(self.b)
+
+    def assertVectors(self, array, vectors):
+        self.assertEqual(len(array), len(vectors))
+        for v, w in zip(array, vectors):
+            self.assertAlmostEqual(v.x, w.x)
+            self.assertAlmostEqual(v.y, w.y)
+            self.assertAlmostEqual(v.z, w.z)
+
+    def test_init(self):
+        v = VectorArray([[0, 1], [2, 3]])
+        self.assertEqual(v.data.shape, (2, 3))
+        self.assertEqual(v[1], Vector(2, 3))
+        self.assertEqual(len(VectorArray()), 0)
+
+        with self.assertRaises(ValueError):
+            VectorArray([1, 2, 3])
+
+    def test_round_trip(self):
+        vectors = [Vector(1, 2, 3), Vector(4, 5)]
+        self.assertEqual(VectorArray.from_vectors(vectors).to_vectors(),
+                         vectors)
+        self.assertEqual(list(VectorArray.from_vectors(vectors)), vectors)
+
+    def test_indexing(self):
+        self.assertEqual(self.va[3], self.a[3])
+        self.assertEqual(self.va[-1], self.a[-1])
+        self.assertEqual(self.va[2:5].to_vectors(), self.a[2:5])
+
+    def test_arithmetic(self):
+        a, b = self.va, self.vb
+        self.assertVectors(a.plus(b), [v.plus(w) for v, w in zip(self.a,
+                                                                 self.b)])
+        self.assertVectors(a + b, [v + w for v, w in zip(self.a, self.b)])
+        self.assertVectors(a.minus(b), [v.minus(w) for v, w in zip(self.a,
+                                                                   self.b)])
+        self.assertVectors(a - b, [v - w for v, w in zip(self.a, self.b)])
+        self.assertVectors(a.times(2.5), [v.times(2.5) for v in self.a])
+        self.assertVectors(a / 4, [v / 4 for v in self.a])
+        self.assertVectors(a.negated(), [v.negated() for v in self.a])
+        self.assertVectors(a.unit(), [v.unit() for v in self.a])
+        self.assertVectors(a.lerp(b, 0.3),
+                           [v.lerp(w, 0.3) for v, w in zip(self.a, self.b)])
+
+    def test_broadcast(self):
+        p = Vector(1, 2)
+        self.assertVectors(self.va.plus(p), [v.plus(p) for v in self.a])
+        np.testing.assert_allclose(self.va.dist(p),
+                                   [v.dist(p) for v in self.a])
+
+        t = np.linspace(0, 1, len(self.a))
+        self.assertVectors(self.va.times(t),
+                           [v.times(s) for v, s in zip(self.a, t)])
+
+    def test_measures(self):
+        a, b = self.va, self.vb
+        np.testing.assert_allclose(a.dot(b),
+                                   [v.dot(w) for v, w in zip(self.a, self.b)])
+        np.testing.assert_allclose(a.length(), [v.length() for v in self.a])
+        np.testing.assert_allclose(a.dist(b),
+                                   [v.dist(w) for v, w in zip(self.a, self.b)])
+        np.testing.assert_allclose(
+            a.squared_length_to(b),
+            [v.squared_length_to(w) for v, w in zip(self.a, self.b)])
+
+    def test_sorted(self):
+        self.assertEqual(self.va.sorted().to_vectors(), sorted(self.a))
+
+        # Coordinates closer than EPSILON tie, and keep their order
+        vectors = [Vector(1, 2), Vector(1 + EPSILON / 2, 1),
+                   Vector(0, 5), Vector(1 - EPSILON / 4, 1 + EPSILON / 2),
+                   Vector(1, 1)]
+        array = VectorArray.from_vectors(vectors)
+        self.assertEqual(array.sorted().to_vectors(), sorted(vectors))
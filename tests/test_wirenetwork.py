@@ -1,7 +1,18 @@
+import tempfile
 import unittest
+import numpy as np
 import random
-
-from gsnlib.wirenetwork import WireNetwork, Edge
+from pathlib import Path
+
+from gsnlib.wirenetwork import (WireNetwork, Edge, line_intersection,
+                                pen_travel, plot_order)
+from gsnlib.wirenetwork.batch import (NONE, OVERLAP, POINT,
+                                      line_intersections)
+from gsnlib.wirenetwork.binary import read_header
+from gsnlib.wirenetwork.index import EdgeIndex
+from gsnlib.wirenetwork.storage import EdgeArray, VertexArray
+from gsnlib.wirenetwork.parallel import build_parallel, clip_segments
+from gsnlib.wirenetwork.stream import StreamBuilder, read_segments
 from gsnlib.vector import Vector
 
 
@@ -136,3 +147,694 @@ class TestWireNetwork(unittest.TestCase):
 
         self.assertEqual(len(n.vertices), 2, n.vertices)
         self.assertEqual(len(n.edges), 1, n.edges)
+
+
+class TestVertexSnapping(unittest.TestCase):
+    def test_snap_across_cells(self):
+        n = WireNetwork(tolerance=1.0)
+        self.assertEqual(n.add_vertex(Vector(0.95, 0.95)), 0)
+        self.assertEqual(n.add_vertex(Vector(1.05, 1.05)), 0)
+        self.assertEqual(n.add_vertex(Vector(2.5, 2.5)), 1)
+        self.assertIsNone(n.add_vertex(Vector(-1.5, 0), add=False))
+
+    def test_lowest_index_wins(self):
+        n = WireNetwork(tolerance=1.0)
+        n.add_vertex(Vector(0, 0))
+        n.add_vertex(Vector(1.5, 0))
+
+        self.assertEqual(n.add_vertex(Vector(0.8, 0), add=False), 0)
+        self.assertEqual(n.add_vertex(Vector(0.7, 0), add=False), 0)
+
+    def test_from_dict_rebuilds_index(self):
+        n = WireNetwork()
+        n.from_dict({'vertices': [[0, 0], [10, 10]], 'edges': [[0, 1]]})
+
+        self.assertEqual(n.add_vertex(Vector(10.05, 10), add=False), 1)
+
+    def test_change_tolerance(self):
+        n = WireNetwork(tolerance=0.1)
+        n.add_vertex(Vector(0, 0))
+        self.assertIsNone(n.add_vertex(Vector(0.5, 0), add=False))
+
+        n.tolerance = 1.0
+        self.assertEqual(n.add_vertex(Vector(0.5, 0), add=False), 0)
+
+
+class TestEdgeIndex(unittest.TestCase):
+    def test_query(self):
+        index = EdgeIndex(1.0)
+        index.insert((0, 1), Vector(0, 0), Vector(0.5, 0.5))
+        index.insert((2, 3), Vector(-50, 10), Vector(50, 10))
+        index.insert((4, 5), Vector(100, 100), Vector(101, 101))
+
+        self.assertEqual(index.query(Vector(0, -1), Vector(0, 20)),
+                         [(0, 1), (2, 3)])
+        self.assertEqual(index.query(Vector(20, 0), Vector(20, 5)), [])
+        self.assertEqual(index.query(Vector(101, 101), Vector(200, 200)),
+                         [(4, 5)])
+
+        index.remove((2, 3))
+        self.assertEqual(index.query(Vector(0, -1), Vector(0, 20)),
+                         [(0, 1)])
+        self.assertEqual(len(index), 2)
+
+    def test_network_keeps_index(self):
+        n = WireNetwork()
+        n.add_segment([0, 0], [10, 0])
+        n.add_segment([5, -5], [5, 5])
+
+        self.assertEqual(len(n._edge_index), len(n.edges))
+        self.assertEqual(len(n._edge_candidates(Vector(0, 1), Vector(10, 1))),
+                         1)
+
+        o = WireNetwork()
+        o.from_dict(n.to_dict())
+        self.assertEqual(len(o._edge_index), 0)
+        self.assertEqual(len(o._edge_candidates(Vector(0, 1), Vector(10, 1))),
+                         1)
+        self.assertEqual(len(o._edge_index), len(o.edges))
+
+        o.drop_indexes()
+        self.assertEqual(len(o._edge_index), 0)
+        self.assertEqual(o.neighbours(0), n.neighbours(0))
+
+    def test_check_edges(self):
+        n = WireNetwork()
+        n.from_dict({'vertices': [[0, 0], [10, 0], [5, -5], [5, 5]],
+                     'edges': [[0, 1], [2, 3]]})
+
+        self.assertRaises(Exception, n.check_edges)
+
+        n = WireNetwork()
+        n.add_segment([0, 0], [10, 0])
+        n.add_segment([0, 5], [10, 5])
+        n.check_edges()
+
+
+class TestAddSegments(unittest.TestCase):
+    def assertSameNetwork(self, a: WireNetwork, b: WireNetwork):
+        self.assertEqual(len(a.vertices), len(b.vertices))
+        self.assertEqual(len(a.edges), len(b.edges))
+
+        def edge_set(n: WireNetwork):
+            return {frozenset((tuple(n.vertices[e.a].v),
+                               tuple(n.vertices[e.b].v)))
+                    for e in n.edges}
+
+        self.assertSetEqual(edge_set(a), edge_set(b))
+
+    def test_cross(self):
+        n = WireNetwork()
+        n.add_segments(np.array([[-10, -10, 10, 10],
+                                 [-10, 10, 10, -10]]))
+
+        self.assertEqual(len(n.vertices), 5)
+        self.assertEqual(len(n.edges), 4)
+
+    def test_same_as_sequential(self):
+        segments = [[2, 2, 2, -2], [4, 2, 4, -2], [0, 0, 10, 0],
+                    [1, -1, 9, 1], [3, 5, 3, 6]]
+
+        a = WireNetwork()
+        for s in segments:
+            a.add_segment(s[:2], s[2:])
+
+        b = WireNetwork()
+        b.add_segments(segments)
+
+        self.assertSameNetwork(a, b)
+
+    def test_into_existing(self):
+        n = WireNetwork()
+        n.add_segment([-10, -10], [10, 10])
+        n.add_segments([[[-10, 10], [10, -10]]])
+
+        self.assertEqual(len(n.vertices), 5)
+        self.assertEqual(len(n.edges), 4)
+
+    def test_overlap_order_independent(self):
+        a = WireNetwork()
+        a.add_segments([[4, 4, 8, 8], [0, 0, 10, 10]])
+
+        b = WireNetwork()
+        b.add_segments([[0, 0, 10, 10], [4, 4, 8, 8]])
+
+        self.assertEqual(len(a.vertices), 4)
+        self.assertEqual(len(a.edges), 3)
+        self.assertSameNetwork(a, b)
+
+    def test_skip_small(self):
+        n = WireNetwork()
+        n.add_segments([[4, 4, 8, 8], [4, 4, 4.0001, 4]])
+
+        self.assertEqual(len(n.vertices), 2)
+        self.assertEqual(len(n.edges), 1)
+
+    def test_empty(self):
+        n = WireNetwork()
+        n.add_segments([])
+
+        self.assertEqual(len(n.vertices), 0)
+
+
+class TestEdgeLookup(unittest.TestCase):
+    def test_has_edge(self):
+        n = WireNetwork()
+        n.add_segment([0, 0], [10, 0])
+
+        self.assertTrue(n.has_edge(0, 1))
+        self.assertTrue(n.has_edge(1, 0))
+        self.assertFalse(n.has_edge(0, 2))
+
+    def test_neighbours(self):
+        n = WireNetwork()
+        n.add_segment([-10, -10], [10, 10])
+        n.add_segment([-10, 10], [10, -10])
+
+        center = n.add_vertex(Vector(0, 0), add=False)
+        self.assertEqual(n.neighbours(center), {0, 1, 2, 3})
+        # The split edge is gone from both ends
+        self.assertEqual(n.neighbours(0), {center})
+        self.assertFalse(n.has_edge(0, 1))
+        self.assertEqual(n.neighbours(100), set())
+
+    def test_from_dict(self):
+        n = WireNetwork()
+        n.from_dict({'vertices': [[0, 0], [10, 0], [10, 10]],
+                     'edges': [[0, 1], [2, 1], [1, 0]]})
+
+        self.assertEqual(len(n.edges), 2)
+        self.assertEqual(n.neighbours(1), {0, 2})
+        self.assertTrue(n.has_edge(1, 2))
+
+
+class TestLineIntersections(unittest.TestCase):
+    def test_matches_line_intersection(self):
+        rnd = random.Random(1)
+        segments = np.array([[[rnd.randrange(-5, 5), rnd.randrange(-5, 5)]
+                              for _ in range(4)] for _ in range(500)],
+                            dtype=float)
+
+        kind, points = line_intersections(segments[:, 0], segments[:, 1],
+                                          segments[:, 2], segments[:, 3])
+
+        for k, s in enumerate(segments.tolist()):
+            i = line_intersection(*[Vector(p) for p in s])
+            if i is None:
+                self.assertEqual(kind[k], NONE)
+            elif isinstance(i, Vector):
+                self.assertEqual(kind[k], POINT)
+                self.assertEqual(points[k, 0].tolist(), [i.x, i.y])
+            else:
+                self.assertEqual(kind[k], OVERLAP)
+                self.assertEqual(points[k].tolist(),
+                                 [[i[0].x, i[0].y], [i[1].x, i[1].y]])
+
+    def test_one_against_many(self):
+        kind, points = line_intersections([-1, 0], [1, 0],
+                                          [[0, -1], [0, 1], [-2, 0]],
+                                          [[0, 1], [0, 2], [0, 0]])
+
+        self.assertEqual(kind.tolist(), [POINT, NONE, OVERLAP])
+        self.assertEqual(points[0, 0].tolist(), [0, 0])
+        self.assertEqual(points[2].tolist(), [[-1, 0], [0, 0]])
+
+    def test_all_pairs(self):
+        lines = np.array([[[0, -1], [0, 1]],
+                          [[-1, 0], [1, 0]],
+                          [[5, 5], [6, 6]]], dtype=float)
+
+        kind, points = line_intersections(lines[:, None, 0],
+                                          lines[:, None, 1],
+                                          lines[None, :, 0],
+                                          lines[None, :, 1])
+
+        self.assertEqual(kind.shape, (3, 3))
+        self.assertEqual(points.shape, (3, 3, 2, 2))
+        self.assertEqual(kind[0, 1], POINT)
+        self.assertEqual(kind[2, 2], OVERLAP)
+        self.assertEqual(kind[0, 2], NONE)
+
+
+class TestCompactStorage(unittest.TestCase):
+    def test_same_as_default(self):
+        segments = [[2, 2, 2, -2], [4, 2, 4, -2], [0, 0, 10, 0],
+                    [1, -1, 9, 1], [0, 0, 10, 0], [3, 5, 3, 6]]
+
+        a = WireNetwork()
+        b = WireNetwork(compact=True)
+        for s in segments:
+            a.add_segment(s[:2], s[2:])
+            b.add_segment(s[:2], s[2:])
+
+        self.assertIsInstance(b._vertices, VertexArray)
+        self.assertIsInstance(b._edges, EdgeArray)
+        self.assertEqual(a.to_dict(), b.to_dict())
+        self.assertEqual(a.edges, b.edges)
+        self.assertEqual(a.vertices, list(b.vertices))
+
+    def test_to_numpy(self):
+        n = WireNetwork(compact=True)
+        n.add_segments([[-10, -10, 10, 10], [-10, 10, 10, -10]])
+
+        vertices, edges = n.to_numpy()
+        self.assertEqual(vertices.shape, (5, 2))
+        self.assertEqual(vertices.dtype, np.float64)
+        self.assertEqual(edges.shape, (4, 2))
+        self.assertEqual(edges.dtype, np.int32)
+
+        # Views of the storage, not copies
+        self.assertTrue(np.shares_memory(vertices, n._vertices._data))
+        self.assertTrue(np.shares_memory(edges, n._edges._data))
+
+        o = WireNetwork()
+        o.add_segments([[-10, -10, 10, 10], [-10, 10, 10, -10]])
+        v, e = o.to_numpy()
+        self.assertTrue(np.array_equal(v, vertices))
+        self.assertTrue(np.array_equal(e, edges))
+
+    def test_to_from_dict(self):
+        n = WireNetwork()
+        for _ in range(10):
+            n.add_segment([random.randrange(-100, 100),
+                           random.randrange(-100, 100)],
+                          [random.randrange(-100, 100),
+                           random.randrange(-100, 100)])
+
+        o = WireNetwork(compact=True)
+        o.from_dict(n.to_dict())
+
+        self.assertDictEqual(n.to_dict(), o.to_dict())
+
+    def test_edge_array(self):
+        edges = EdgeArray()
+        for i in range(40):
+            edges[(i, i + 1)] = Edge(i + 1, i)
+        for i in range(0, 40, 2):
+            del edges[(i, i + 1)]
+        edges[(0, 1)] = Edge(0, 1)
+
+        self.assertEqual(len(edges), 21)
+        self.assertNotIn((2, 3), edges)
+        self.assertEqual(edges[(3, 4)], Edge(4, 3))
+        self.assertEqual(list(edges)[-1], (0, 1))
+        self.assertEqual(edges.data.tolist()[:2], [[2, 1], [4, 3]])
+        self.assertEqual(edges.data.tolist()[-1], [0, 1])
+
+
+class TestBinaryFormat(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = Path(self.folder.name) / 'network.bin'
+
+        self.network = WireNetwork(tolerance=0.25)
+        for _ in range(20):
+            self.network.add_segment([random.randrange(-100, 100),
+                                      random.randrange(-100, 100)],
+                                     [random.randrange(-100, 100),
+                                      random.randrange(-100, 100)])
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_save_load(self):
+        self.network.save(self.path, meta={'source': 'test'})
+
+        for mmap in (True, False):
+            for compact in (True, False):
+                o = WireNetwork.load(self.path, mmap=mmap, compact=compact)
+                self.assertEqual(o.tolerance, 0.25)
+                self.assertEqual(o.compact, compact)
+                self.assertDictEqual(self.network.to_dict(), o.to_dict())
+
+        header, _ = read_header(self.path)
+        self.assertEqual(header['meta'], {'source': 'test'})
+
+    def test_memory_mapped(self):
+        self.network.save(self.path)
+        o = WireNetwork.load(self.path)
+
+        vertices, edges = o.to_numpy()
+        self.assertIsInstance(vertices, np.memmap)
+        self.assertIsInstance(edges, np.memmap)
+
+    def test_from_numpy_types(self):
+        vertices = np.array([[0, 0], [10, 10]])
+        edges = np.array([[0, 1]], dtype=np.int64)
+        o = WireNetwork.from_numpy(vertices, edges)
+        o.add_segment([0.5, 5.5], [3.7, 2.2])
+
+        n = WireNetwork()
+        n.add_segment([0, 0], [10, 10])
+        n.add_segment([0.5, 5.5], [3.7, 2.2])
+        self.assertDictEqual(n.to_dict(), o.to_dict())
+
+        # Arrays of the right types are used as they are
+        vertices, edges = o.to_numpy()
+        p = WireNetwork.from_numpy(vertices, edges)
+        self.assertTrue(np.shares_memory(p.to_numpy()[0], vertices))
+        self.assertTrue(np.shares_memory(p.to_numpy()[1], edges))
+
+    def test_edit_loaded(self):
+        self.network.save(self.path)
+        o = WireNetwork.load(self.path)
+
+        o.add_segment([-200, -200], [200, 200])
+        self.network.add_segment([-200, -200], [200, 200])
+        self.assertDictEqual(self.network.to_dict(), o.to_dict())
+
+        # The file itself is untouched
+        p = WireNetwork.load(self.path)
+        self.assertLess(len(p.edges), len(o.edges))
+
+    def test_empty(self):
+        WireNetwork().save(self.path)
+        o = WireNetwork.load(self.path)
+
+        self.assertEqual(len(o.vertices), 0)
+        self.assertEqual(len(o.edges), 0)
+
+    def test_not_a_network(self):
+        self.path.write_bytes(b'{"vertices": []}')
+
+        self.assertRaises(ValueError, WireNetwork.load, self.path)
+
+
+class TestStreamBuilder(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = Path(self.folder.name) / 'checkpoint.bin'
+
+        rng = random.Random(7)
+        self.segments = [[rng.uniform(-50, 50) for _ in range(4)]
+                         for _ in range(200)]
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_matches_add_segments(self):
+        n = StreamBuilder(chunk_size=50).consume(iter(self.segments))
+
+        o = WireNetwork(compact=True)
+        for i in range(0, len(self.segments), 50):
+            o.add_segments(self.segments[i:i + 50])
+
+        self.assertDictEqual(n.to_dict(), o.to_dict())
+
+    def test_progress(self):
+        reports = []
+        StreamBuilder(chunk_size=64,
+                      progress=reports.append).consume(self.segments)
+
+        self.assertEqual([r.segments for r in reports], [64, 128, 192, 200])
+        self.assertTrue(all(r.rate >= 0 for r in reports))
+
+    def test_resume(self):
+        def interrupted():
+            for i, segment in enumerate(self.segments):
+                if i == 130:
+                    raise KeyboardInterrupt
+                yield segment
+
+        builder = StreamBuilder(chunk_size=20, checkpoint=self.path,
+                                checkpoint_every=40)
+        with self.assertRaises(KeyboardInterrupt):
+            builder.consume(interrupted())
+
+        header, _ = read_header(self.path)
+        self.assertEqual(header['meta'], {'segments': 120})
+
+        resumed = StreamBuilder.resume(self.path, chunk_size=20,
+                                       checkpoint_every=40)
+        self.assertEqual(resumed.consumed, 120)
+        n = resumed.consume(self.segments)
+
+        o = StreamBuilder(chunk_size=20).consume(self.segments)
+        self.assertDictEqual(n.to_dict(), o.to_dict())
+
+        header, _ = read_header(self.path)
+        self.assertEqual(header['meta'], {'segments': 200})
+        self.assertDictEqual(WireNetwork.load(self.path).to_dict(),
+                             o.to_dict())
+
+    def test_consecutive_streams(self):
+        builder = StreamBuilder(chunk_size=20)
+        builder.consume(self.segments[:80])
+        n = builder.consume(self.segments[80:])
+        self.assertEqual(builder.consumed, 200)
+
+        o = StreamBuilder(chunk_size=20).consume(self.segments)
+        self.assertDictEqual(n.to_dict(), o.to_dict())
+
+        # Only the first stream after resume skips what was consumed
+        builder.checkpoint_path = self.path
+        builder.save_checkpoint()
+        resumed = StreamBuilder.resume(self.path)
+        resumed.consume(self.segments)
+        resumed.consume([[100, 100, 110, 110]])
+        self.assertEqual(resumed.consumed, 201)
+        self.assertEqual(len(resumed.network.edges), len(o.edges) + 1)
+
+    def test_read_segments(self):
+        path = Path(self.folder.name) / 'segments.txt'
+        path.write_text("# x1 y1 x2 y2\n0 0 10 10\n\n0,10, 10,0\n")
+
+        segments = list(read_segments(path))
+        self.assertEqual(segments, [[0, 0, 10, 10], [0, 10, 10, 0]])
+
+        n = StreamBuilder().consume(read_segments(path))
+        self.assertEqual(len(n.vertices), 5)
+        self.assertEqual(len(n.edges), 4)
+
+
+class TestParallelBuild(unittest.TestCase):
+    @staticmethod
+    def topology(network):
+        vertices, edges = network.to_numpy()
+        points = [tuple(np.round(v, 6)) for v in vertices.tolist()]
+        return {frozenset((points[a], points[b])) for a, b in edges.tolist()}
+
+    def test_clip_segments(self):
+        segments = np.array([[-5, 5, 15, 5],
+                             [2, 2, 8, 8],
+                             [20, 20, 30, 30],
+                             [-5, -5, 5, 15]], dtype=float)
+        clipped = clip_segments(segments, (0, 0, 10, 10))
+        np.testing.assert_allclose(clipped, [[0, 5, 10, 5],
+                                             [2, 2, 8, 8],
+                                             [0, 5, 2.5, 10]])
+
+    def test_grid(self):
+        # Lines crossing every seam, meeting on and off seams
+        segments = ([[0, y, 100, y] for y in range(0, 101, 10)]
+                    + [[x, 0, x, 100] for x in range(5, 100, 10)]
+                    + [[0, 0, 100, 100], [0, 100, 100, 0]])
+
+        serial = WireNetwork(compact=True)
+        serial.add_segments(segments)
+        for tiles in (1, 2, 4, 5):
+            n = build_parallel(segments, tiles=tiles, workers=1)
+            self.assertEqual(len(n.vertices), len(serial.vertices))
+            self.assertEqual(self.topology(n), self.topology(serial))
+
+    def test_along_seam(self):
+        # Segments on the seam y = 5, met from either side at different x
+        segments = [[0, 5, 10, 5], [3, 0, 3, 5], [7, 5, 7, 10],
+                    [0, 0, 0, 10], [10, 0, 10, 10]]
+
+        serial = WireNetwork(compact=True)
+        serial.add_segments(segments)
+        n = build_parallel(segments, tiles=2, workers=1)
+        self.assertEqual(len(n.edges), len(serial.edges))
+        self.assertEqual(self.topology(n), self.topology(serial))
+
+        rng = random.Random(5)
+        for _ in range(20):
+            segments = []
+            for _ in range(10):
+                at = rng.randint(0, 10)
+                a, b = sorted(rng.sample(range(11), 2))
+                segments.append([a, at, b, at] if rng.random() < 0.5
+                                else [at, a, at, b])
+
+            serial = WireNetwork(compact=True)
+            serial.add_segments(segments)
+            for tiles in (2, 3):
+                n = build_parallel(segments, tiles=tiles, workers=1)
+                self.assertEqual(len(n.edges), len(serial.edges))
+                self.assertEqual(self.topology(n), self.topology(serial))
+
+    def test_random(self):
+        rng = random.Random(3)
+        segments = [[rng.uniform(0, 100) for _ in range(4)]
+                    for _ in range(60)]
+
+        serial = WireNetwork(tolerance=1e-3, compact=True)
+        serial.add_segments(segments)
+        n = build_parallel(segments, tolerance=1e-3, tiles=3, workers=1)
+        self.assertEqual(len(n.vertices), len(serial.vertices))
+        self.assertEqual(self.topology(n), self.topology(serial))
+
+    def test_workers(self):
+        segments = [[0, 0, 10, 10], [0, 10, 10, 0], [0, 5, 10, 5]]
+        n = build_parallel(segments, tiles=2, workers=2, compact=False)
+        self.assertFalse(n.compact)
+        self.assertEqual(len(n.vertices), 7)
+        self.assertEqual(len(n.edges), 6)
+
+    def test_empty(self):
+        n = build_parallel([], workers=1)
+        self.assertEqual(len(n.vertices), 0)
+        self.assertEqual(len(n.edges), 0)
+
+
+class TestGraph(unittest.TestCase):
+    def setUp(self):
+        # A square with one diagonal, and a separate line
+        self.network = WireNetwork()
+        self.network.from_dict({
+            'vertices': [[0, 0], [10, 0], [10, 10], [0, 10],
+                         [20, 0], [30, 0], [40, 0]],
+            'edges': [[0, 1], [1, 2], [2, 3], [3, 0], [0, 2],
+                      [4, 5], [5, 6]]})
+
+    def assertCovers(self, trails, edges):
+        used = [frozenset(pair) for trail in trails
+                for pair in zip(trail, trail[1:])]
+        self.assertEqual(len(used), len(edges))
+        self.assertSetEqual(set(used), {frozenset(e) for e in edges})
+
+    def test_csr(self):
+        g = self.network.graph()
+
+        self.assertEqual(len(g), 7)
+        self.assertEqual(g.degrees().tolist(), [3, 2, 3, 2, 1, 2, 1])
+        self.assertEqual(sorted(g.neighbours(0).tolist()), [1, 2, 3])
+        for i in range(len(g)):
+            self.assertSetEqual(set(g.neighbours(i).tolist()),
+                                self.network.neighbours(i))
+
+    def test_components(self):
+        labels = self.network.graph().connected_components()
+
+        self.assertEqual(labels.tolist(), [0, 0, 0, 0, 1, 1, 1])
+
+    def test_shortest_path(self):
+        g = self.network.graph()
+
+        length, path = g.shortest_path(1, 3)
+        self.assertEqual(length, 20)
+        self.assertIn(path, ([1, 0, 3], [1, 2, 3]))
+
+        length, path = g.shortest_path(3, 1)
+        self.assertEqual(length, 20)
+
+        length, path = g.shortest_path(0, 6)
+        self.assertEqual(length, float('inf'))
+        self.assertEqual(path, [])
+
+        self.assertEqual(g.shortest_path(4, 4), (0.0, [4]))
+
+    def test_eulerian_trails(self):
+        trails = self.network.graph().eulerian_trails()
+
+        # One trail between the two odd corners, one for the line
+        self.assertEqual(len(trails), 2)
+        self.assertCovers(trails, self.network.to_dict()['edges'])
+
+    def test_eulerian_closed(self):
+        n = WireNetwork()
+        n.from_dict({'vertices': [[0, 0], [1, 0], [1, 1], [0, 1]],
+                     'edges': [[0, 1], [1, 2], [2, 3], [3, 0]]})
+
+        trails = n.graph().eulerian_trails()
+        self.assertEqual(len(trails), 1)
+        self.assertEqual(trails[0][0], trails[0][-1])
+        self.assertCovers(trails, n.to_dict()['edges'])
+
+    def test_eulerian_random(self):
+        n = WireNetwork()
+        rnd = random.Random(2)
+        n.add_segments([[rnd.randrange(0, 50) for _ in range(4)]
+                        for _ in range(40)])
+
+        g = n.graph()
+        trails = g.eulerian_trails()
+        labels, degrees = g.connected_components(), g.degrees()
+        odd = int((degrees % 2 == 1).sum())
+        closed = len(set(labels[degrees > 0].tolist())
+                     - set(labels[degrees % 2 == 1].tolist()))
+
+        self.assertEqual(len(trails), odd // 2 + closed)
+        self.assertCovers(trails, n.to_dict()['edges'])
+
+    def test_cached(self):
+        g = self.network.graph()
+        self.assertIs(g, self.network.graph())
+
+        self.network.add_segment([0, 20], [10, 20])
+        self.assertIsNot(g, self.network.graph())
+        self.assertEqual(len(self.network.graph().edges), 8)
+
+
+class TestPlotOrder(unittest.TestCase):
+    def test_parallel_lines(self):
+        n = WireNetwork()
+        n.add_segments([[0, 0, 10, 0], [10, 2, 0, 2], [0, 4, 10, 4]])
+
+        strokes = plot_order(n)
+
+        self.assertEqual(len(strokes), 3)
+        # Zig-zag from the origin, never crossing back with the pen up
+        self.assertEqual([(s[0].x, s[0].y) for s in strokes],
+                         [(0, 0), (10, 2), (0, 4)])
+        self.assertAlmostEqual(pen_travel(strokes), 4)
+
+    def test_chains_edges(self):
+        n = WireNetwork()
+        n.add_segment([0, 0], [10, 0])
+        n.add_segment([10, 0], [10, 10])
+        n.add_segment([10, 10], [20, 10])
+
+        strokes = plot_order(n)
+        self.assertEqual(len(strokes), 1)
+        self.assertEqual(len(strokes[0]), 4)
+
+    def test_covers_edges(self):
+        rnd = random.Random(5)
+        n = WireNetwork()
+        n.add_segments([[rnd.uniform(0, 100) for _ in range(4)]
+                        for _ in range(60)])
+
+        strokes = plot_order(n)
+        drawn = sorted(tuple(sorted(((a.x, a.y), (b.x, b.y))))
+                       for s in strokes for a, b in zip(s, s[1:]))
+        edges = sorted(tuple(sorted(((n.vertices[e.a].x, n.vertices[e.a].y),
+                                     (n.vertices[e.b].x, n.vertices[e.b].y))))
+                       for e in n.edges)
+        self.assertEqual(drawn, edges)
+
+        greedy = plot_order(n, passes=0)
+        self.assertLessEqual(pen_travel(strokes), pen_travel(greedy))
+
+    def test_empty(self):
+        self.assertEqual(plot_order(WireNetwork()), [])
+
+    def test_single_stroke(self):
+        n = WireNetwork()
+        n.add_segment([10, 10], [20, 10])
+
+        strokes = plot_order(n)
+        self.assertEqual([[(p.x, p.y) for p in s] for s in strokes],
+                         [[(10, 10), (20, 10)]])
+
+    def test_collinear(self):
+        # Every endpoint on one line, so the grid has no extent across it
+        for dashes in ([[2 * i, 5, 2 * i + 1, 5] for i in range(20)],
+                       [[5, 2 * i + 1, 5, 2 * i] for i in range(20)]):
+            n = WireNetwork()
+            n.add_segments(dashes)
+
+            strokes = plot_order(n)
+            self.assertEqual(len(strokes), 20)
+            self.assertAlmostEqual(pen_travel(strokes), 5 + 19)